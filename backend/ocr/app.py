@@ -1,12 +1,22 @@
 import os
-import cv2
-import numpy as np
+import json
+import time
+import tempfile
+import zipfile
+import multiprocessing
 import pytesseract
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
-from PIL import Image
-import re
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from flask import Flask, Response, request, jsonify, stream_with_context
 from dotenv import load_dotenv
+from engine import TesseractPool
+from cache import OCRCache, content_key
+from preprocess import Preprocessor
+from decoding import ImageDecoder, PixelBudget, ImageTooLarge, BudgetExhausted, upload_buffer
+from jobs import JobQueue, QueueFull, UnknownJobKind, public_job
+from extraction import VOCABULARY_PATH, load_extractor
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -16,102 +26,232 @@ app = Flask(__name__)
 # Configure OCR engine
 pytesseract.pytesseract.tesseract_cmd = os.environ.get('TESSERACT_CMD', 'tesseract')
 
-# Configure upload folder
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp')
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# Warm Tesseract engines, one per core unless OCR_ENGINES says otherwise
+tesseract_pool = TesseractPool(
+    size=int(os.environ.get('OCR_ENGINES', 0)) or None,
+    lang=os.environ.get('TESSERACT_LANG', 'eng'),
+    tessdata=os.environ.get('TESSDATA_PATH')
+)
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
+# Adaptive preprocessing: rescale to a target character height, crop to the
+# detected text, deskew and pick Otsu or adaptive thresholding per image
+preprocessor = Preprocessor(
+    target_char_height=int(os.environ.get('OCR_TARGET_CHAR_HEIGHT', 32)),
+    max_side=int(os.environ.get('OCR_MAX_SIDE', 2400)),
+    regions=os.environ.get('OCR_REGIONS', 'crop'),
+    deskew=os.environ.get('OCR_DESKEW', 'true').lower() == 'true',
+    threshold=os.environ.get('OCR_THRESHOLD', 'auto'),
+    illumination_spread=int(os.environ.get('OCR_ILLUMINATION_SPREAD', 40)),
+    denoise=os.environ.get('OCR_DENOISE', 'true').lower() == 'true'
+)
+
+# Decode frame by frame within a pixel limit per frame and a pixel budget
+# per worker process; oversized frames are downsized (or rejected with
+# OCR_OVERSIZE=reject) and JPEGs decoded at reduced size where possible
+image_decoder = ImageDecoder(
+    max_pixels=int(os.environ.get('OCR_MAX_PIXELS', 24_000_000)),
+    oversize=os.environ.get('OCR_OVERSIZE', 'downsize'),
+    max_frames=int(os.environ.get('OCR_MAX_FRAMES', 20)),
+    budget=PixelBudget(
+        total=int(os.environ.get('OCR_PIXEL_BUDGET', 64_000_000)),
+        wait=float(os.environ.get('OCR_PIXEL_BUDGET_WAIT', 30))
+    )
+)
+
+# Field extractor with the make, model and brand vocabulary compiled once
+text_extractor = load_extractor(os.environ.get('OCR_VOCABULARY_PATH', VOCABULARY_PATH))
+
+# Cache of OCR payloads keyed on image content and pipeline configuration
+ocr_cache = OCRCache(
+    max_entries=int(os.environ.get('OCR_CACHE_SIZE', 512)),
+    path=os.environ.get('OCR_CACHE_PATH'),
+    max_disk_bytes=int(os.environ.get('OCR_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+)
+
+# Configure upload limits
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('OCR_MAX_UPLOAD_BYTES', 16 * 1024 * 1024))  # 16MB max upload
+
+# Batch OCR limits and worker processes (one per core by default)
+OCR_PROCESSES = int(os.environ.get('OCR_PROCESSES', 0)) or os.cpu_count() or 1
+BATCH_MAX_IMAGES = int(os.environ.get('BATCH_MAX_IMAGES', 100))
+BATCH_MAX_ARCHIVE_BYTES = int(os.environ.get('BATCH_MAX_ARCHIVE_BYTES', 64 * 1024 * 1024))
+# Whole-batch limit; keep it under the gunicorn worker timeout
+BATCH_TIMEOUT = float(os.environ.get('BATCH_TIMEOUT', 90))
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff'}
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tif', 'tiff'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def preprocess_image(image_path):
-    """
-    Preprocess the image to improve OCR accuracy
+def decode_image(data):
     """
-    # Read image
-    image = cv2.imread(image_path)
-    
-    # Convert to grayscale
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    Decode the first frame of uploaded image bytes into a grayscale NumPy array
     
-    # Apply thresholding to enhance text
-    thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-    
-    # Apply dilation and erosion to remove noise
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-    opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=1)
-    
-    # Save the preprocessed image
-    preprocessed_path = os.path.join(
-        os.path.dirname(image_path),
-        'preprocessed_' + os.path.basename(image_path)
-    )
-    cv2.imwrite(preprocessed_path, opening)
+    The array is returned outside the worker's pixel budget; requests go
+    through image_decoder.frames instead.
+    """
+    frames = image_decoder.frames(data)
+    try:
+        image, _ = next(frames)
+    except StopIteration:
+        raise ValueError('Could not decode image')
+    finally:
+        frames.close()
+    return image
+
+def preprocess_image(image):
+    """
+    Preprocess the image to improve OCR accuracy
     
-    return preprocessed_path
+    Returns the text regions to recognise, in reading order, and a report of
+    the preprocessing choices made for this image.
+    """
+    with metrics.stage('preprocess'):
+        return preprocessor.run(image)
 
-def extract_text(image_path):
+def extract_text(image):
     """
     Extract text from image using OCR
     """
     # Preprocess the image
-    preprocessed_path = preprocess_image(image_path)
-    
-    # Use Tesseract to extract text
-    text = pytesseract.image_to_string(Image.open(preprocessed_path))
+    regions, report = preprocess_image(image)
     
-    # Clean up temporary file
-    os.remove(preprocessed_path)
-    
-    return text
+    # Use a warm Tesseract engine to extract text from each region
+    with metrics.stage('tesseract'):
+        text = '\n'.join(tesseract_pool.image_to_string(region) for region in regions)
+    return text, report
 
 def process_text(text):
     """
     Process the extracted text to identify key information
     """
-    # Remove extra whitespace
-    processed_text = re.sub(r'\s+', ' ', text).strip()
-    
-    # Extract potential part numbers (alphanumeric sequences)
-    part_numbers = re.findall(r'[A-Z0-9]{5,}', processed_text)
-    
-    # Extract potential vehicle makes
-    common_makes = ['Toyota', 'Honda', 'Ford', 'Chevrolet', 'BMW', 'Mercedes', 'Audi', 'Nissan', 'Hyundai', 'Kia']
-    vehicle_makes = []
-    for make in common_makes:
-        if re.search(r'\b' + make + r'\b', processed_text, re.IGNORECASE):
-            vehicle_makes.append(make)
-    
-    # Extract potential dimensions (e.g., 10x20x30)
-    dimensions = re.findall(r'\b\d+(\.\d+)?[xX]\d+(\.\d+)?([xX]\d+(\.\d+)?)?\b', processed_text)
+    with metrics.stage('process_text'):
+        return text_extractor.extract(text)
+
+def ocr_pages(data):
+    """
+    Run the full OCR pipeline on each frame of raw image bytes, yielding one result per page
     
-    # Extract potential weights
-    weights = re.findall(r'\b\d+(\.\d+)?\s*(kg|g|lb|oz|pound|ounce)\b', processed_text, re.IGNORECASE)
+    Frames are decoded one at a time as the results are consumed.
+    """
+    for image, decoding in image_decoder.frames(data):
+        raw_text, preprocessing = extract_text(image)
+        image = None
+        processed_text, extracted_info = process_text(raw_text)
+        
+        yield {
+            'page': decoding['frame'] + 1,
+            'text': raw_text,
+            'processed_text': processed_text,
+            'extracted_info': extracted_info,
+            'preprocessing': dict(preprocessing, decoding=decoding)
+        }
+
+def combine_pages(pages):
+    """
+    The response payload for a list of page results
     
-    # Extract potential prices
-    prices = re.findall(r'\$\s*\d+(\.\d{2})?', processed_text)
+    A single-frame image gives the page's fields alone. A multi-page image
+    gives the joined text with fields extracted from all of it, the first
+    page's preprocessing report and every page under ``pages``.
+    """
+    if len(pages) == 1:
+        return {key: value for key, value in pages[0].items() if key != 'page'}
     
-    # Organize extracted information
-    extracted_info = {
-        'part_numbers': part_numbers,
-        'vehicle_makes': vehicle_makes,
-        'dimensions': [d[0] for d in dimensions],
-        'weights': [f"{w[0]} {w[1]}" for w in weights],
-        'prices': prices
+    text = '\n\n'.join(page['text'] for page in pages)
+    processed_text, extracted_info = process_text(text)
+    return {
+        'text': text,
+        'processed_text': processed_text,
+        'extracted_info': extracted_info,
+        'preprocessing': pages[0]['preprocessing'],
+        'pages': pages,
+        'truncated': pages[0]['preprocessing']['decoding']['frames'] > len(pages)
     }
+
+def ocr_image(data):
+    """
+    Run the full OCR pipeline on raw image bytes and return the response payload
+    """
+    return combine_pages(list(ocr_pages(data)))
+
+def ocr_config():
+    """
+    Settings that change OCR output; part of every cache key
+    """
+    return {
+        'lang': tesseract_pool.lang,
+        'engine': 'tesserocr' if tesseract_pool.persistent else 'pytesseract',
+        'decode': image_decoder.settings(),
+        'preprocess': preprocessor.settings(),
+        'vocabulary': text_extractor.vocabulary.fingerprint
+    }
+
+def use_cache():
+    return request.form.get('cache', 'true').lower() != 'false'
+
+def want_timings():
+    return request.form.get('timings', 'false').lower() == 'true'
+
+def cache_lookup(data, use_cache=True):
+    """
+    Return ``(key, payload)`` for image bytes; payload is None on a miss or with the cache off
+    """
+    key = content_key(data, ocr_config())
+    payload = ocr_cache.get(key) if use_cache else None
+    if use_cache:
+        metrics.cache_lookup('hit' if payload is not None else 'miss')
+    return key, payload
+
+def cached_ocr_image(data, use_cache=True):
+    """
+    ocr_image behind the content-hash cache; a re-uploaded image is answered without decoding it
+    """
+    key, payload = cache_lookup(data, use_cache)
+    if payload is None:
+        payload = ocr_image(data)
+        ocr_cache.set(key, payload)
+    return payload
+
+def streamed_ocr_image(data, use_cache=True):
+    """
+    cached_ocr_image as a generator: each page's result as soon as it is
+    recognised, then the payload without ``pages`` and with ``done: true``
+    """
+    key, payload = cache_lookup(data, use_cache)
+    if payload is None:
+        pages = []
+        for page in ocr_pages(data):
+            pages.append(page)
+            yield page
+        payload = combine_pages(pages)
+        ocr_cache.set(key, payload)
+    else:
+        yield from payload.get('pages') or [dict(payload, page=1)]
     
-    return processed_text, extracted_info
+    yield dict({key: value for key, value in payload.items() if key != 'pages'}, done=True)
 
-@app.route('/process', methods=['POST'])
-def process_image():
+# Run an image submitted through /jobs
+def run_ocr_job(payload, data):
+    return cached_ocr_image(data, payload.get('cache', True))
+
+# Persistent queue for OCR jobs; runner threads start in each server worker
+JOBS_MAX_WAIT = float(os.environ.get('JOBS_MAX_WAIT', 60))
+JOBS_EVENTS_MAX_SECONDS = float(os.environ.get('JOBS_EVENTS_MAX_SECONDS', JOBS_MAX_WAIT * 10))
+job_queue = JobQueue(
+    # Outside the source tree, which docker-compose bind-mounts into the container
+    os.environ.get('JOBS_DB_PATH', os.path.join(tempfile.gettempdir(), 'ocr-jobs.db')),
+    {'ocr': run_ocr_job},
+    workers=int(os.environ.get('JOBS_WORKERS', 1)),
+    max_queued=int(os.environ.get('JOBS_MAX_QUEUED', 200)),
+    retention=int(os.environ.get('JOBS_RETENTION', 86400)),
+    drain_timeout=float(os.environ.get('JOBS_DRAIN_TIMEOUT', 30))
+)
+
+def check_upload():
     """
-    Process an uploaded image with OCR
+    Return an error response if the request has no acceptable ``image`` file, else None
     """
     # Check if image file is present
     if 'image' not in request.files:
@@ -127,41 +267,329 @@ def process_image():
     if not allowed_file(file.filename):
         return jsonify({'error': 'File type not allowed'}), 400
     
+    return None
+
+# Process pool for batch OCR, created on first use so each server worker gets its own.
+# Children come from a forkserver rather than a fork of this worker, whose job
+# runner threads may hold logging, metrics or SQLite locks at the moment of the fork
+_batch_executor = None
+
+def get_batch_executor():
+    global _batch_executor
+    if _batch_executor is None:
+        _batch_executor = ProcessPoolExecutor(
+            max_workers=OCR_PROCESSES,
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+    return _batch_executor
+
+def discard_batch_executor(executor):
+    """
+    Drop a pool one of whose processes died, so the next batch starts a fresh one
+    """
+    global _batch_executor
+    if _batch_executor is executor:
+        _batch_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def submit_batch(pending):
+    """
+    Send ``(index, filename, data, key)`` images to the pool and return ``(executor, futures)``
+    """
+    # A child killed by the kernel or a crashing tesseract breaks the whole pool
+    # and it refuses new work; rebuild it once before giving up
+    for attempt in range(2):
+        executor = get_batch_executor()
+        try:
+            return executor, {
+                executor.submit(ocr_image, data): (index, filename, key)
+                for index, filename, data, key in pending
+            }
+        except BrokenProcessPool:
+            discard_batch_executor(executor)
+            if attempt:
+                raise
+
+def read_batch_images():
+    """
+    Collect ``(filename, bytes)`` pairs from an ``images`` multipart list or an ``archive`` zip
+    """
+    images = []
+    
+    for file in request.files.getlist('images'):
+        if not file.filename or not allowed_file(file.filename):
+            raise ValueError(f"File type not allowed: {file.filename!r}")
+        images.append((file.filename, file.read()))
+    
+    if 'archive' in request.files:
+        try:
+            with zipfile.ZipFile(request.files['archive'].stream) as archive:
+                members = [
+                    member for member in archive.infolist()
+                    if not member.is_dir() and allowed_file(member.filename)
+                ]
+                # Refuse archives that would expand beyond the limit
+                if sum(member.file_size for member in members) > BATCH_MAX_ARCHIVE_BYTES:
+                    raise ValueError('Archive contents are too large')
+                for member in members:
+                    images.append((member.filename, archive.read(member)))
+        except zipfile.BadZipFile:
+            raise ValueError('Archive is not a valid zip file')
+    
+    return images
+
+@app.route('/process/batch', methods=['POST'])
+def process_batch():
+    """
+    Process many images with OCR across a process pool
+    
+    Accepts several ``images`` files and/or one ``archive`` zip. Results are
+    returned in input order; with ``stream=true`` the response is NDJSON with
+    one line per image as it finishes, followed by ``{"done": true}``.
+    Images not finished within BATCH_TIMEOUT seconds get an error instead.
+    So do images whose pool process dies; the pool is rebuilt for the next batch.
+    """
     try:
-        # Save the file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        images = read_batch_images()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not images:
+        return jsonify({'error': 'No image files provided'}), 400
+    if len(images) > BATCH_MAX_IMAGES:
+        return jsonify({'error': f"At most {BATCH_MAX_IMAGES} images per batch"}), 400
+    
+    # Answer repeated images from the cache and only send the rest to the pool
+    config = ocr_config()
+    cached = []
+    pending = []
+    for index, (filename, data) in enumerate(images):
+        key = content_key(data, config)
+        payload = ocr_cache.get(key) if use_cache() else None
+        if use_cache():
+            metrics.cache_lookup('hit' if payload is not None else 'miss')
+        if payload is not None:
+            cached.append((index, filename, payload))
+        else:
+            pending.append((index, filename, data, key))
+    
+    try:
+        executor, futures = submit_batch(pending)
+    except BrokenProcessPool as e:
+        return jsonify({'error': f"OCR process pool unavailable: {str(e)}"}), 503, {'Retry-After': '10'}
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    
+    def completed():
+        for index, filename, payload in cached:
+            yield dict(payload, index=index, filename=filename, cached=True)
         
-        # Extract text from image
-        raw_text = extract_text(filepath)
+        finished = set()
+        try:
+            for future in as_completed(futures, timeout=max(deadline - time.monotonic(), 0)):
+                finished.add(future)
+                index, filename, key = futures[future]
+                result = {'index': index, 'filename': filename}
+                try:
+                    payload = future.result()
+                except BrokenProcessPool as e:
+                    discard_batch_executor(executor)
+                    result['error'] = str(e)
+                except Exception as e:
+                    result['error'] = str(e)
+                else:
+                    ocr_cache.set(key, payload)
+                    result.update(payload)
+                yield result
+        except FuturesTimeout:
+            for future, (index, filename, key) in futures.items():
+                if future not in finished:
+                    future.cancel()
+                    yield {'index': index, 'filename': filename, 'error': f"Timed out after {BATCH_TIMEOUT}s"}
+    
+    if request.form.get('stream', 'false').lower() == 'true':
+        def generate():
+            for result in completed():
+                yield json.dumps(result) + '\n'
+            yield json.dumps({'done': True}) + '\n'
         
-        # Process the extracted text
-        processed_text, extracted_info = process_text(raw_text)
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    results = sorted(completed(), key=lambda result: result['index'])
+    return jsonify({'results': results})
+
+@app.route('/process', methods=['POST'])
+def process_image():
+    """
+    Process an uploaded image with OCR
+    
+    Multi-page TIFFs and animated GIFs are recognised frame by frame and
+    the response lists each under ``pages``; with ``stream=true`` it is
+    NDJSON instead, one line per page as it is recognised, followed by the
+    combined result with ``"done": true``. With the form field
+    ``timings=true`` the response also carries a per-stage timing breakdown
+    of this request.
+    """
+    error = check_upload()
+    if error:
+        return error
+    
+    file = request.files['image']
+    timings = want_timings()
+    cache = use_cache()
+    
+    if request.form.get('stream', 'false').lower() == 'true':
+        # Map the upload now; the request's files are closed before the response body is sent
+        upload = ExitStack()
+        data = upload.enter_context(upload_buffer(file.stream))
         
-        # Clean up temporary file
-        os.remove(filepath)
+        def generate():
+            with upload, metrics.tracing(timings) as trace:
+                try:
+                    for result in streamed_ocr_image(data, cache):
+                        if result.get('done') and trace is not None:
+                            result = dict(result, timings=trace.to_dict())
+                        yield json.dumps(result) + '\n'
+                except Exception as e:
+                    yield json.dumps({'error': str(e), 'done': True}) + '\n'
         
-        return jsonify({
-            'text': raw_text,
-            'processed_text': processed_text,
-            'extracted_info': extracted_info
-        })
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
-    except Exception as e:
-        # Clean up temporary file if it exists
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    try:
+        # Map the spooled upload rather than reading it, and OCR it frame by frame
+        with upload_buffer(file.stream) as data, metrics.tracing(timings) as trace:
+            payload = cached_ocr_image(data, cache)
         
+        if trace is not None:
+            payload = dict(payload, timings=trace.to_dict())
+        return jsonify(payload)
+    
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    
+    except BudgetExhausted as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '10'}
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue an uploaded image for OCR and return its id at once
+    
+    Takes the same ``image`` upload as /process plus an optional
+    ``priority`` form field (an integer from -100 to 100, higher runs
+    sooner). Responds 202 with the job, or 429 when too many jobs are queued.
+    """
+    error = check_upload()
+    if error:
+        return error
+    
+    file = request.files['image']
+    payload = {'filename': file.filename, 'cache': use_cache()}
+    
+    try:
+        # Refuse an image the decoder would reject before it takes a place in the queue
+        with upload_buffer(file.stream) as data:
+            image_decoder.check(data)
+            data = bytes(data)
+        job = job_queue.submit('ocr', payload, data=data, priority=request.form.get('priority', 0))
+    except ImageTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except (UnknownJobKind, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '30'}
+    
+    return jsonify(public_job(job)), 202, {'Location': f"/jobs/{job['id']}"}
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Job state and, once finished, its OCR result
+    
+    With ``?wait=N`` the request is held for up to N seconds (capped at
+    JOBS_MAX_WAIT) until the job finishes.
+    """
+    try:
+        wait = min(float(request.args.get('wait', 0)), JOBS_MAX_WAIT)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(public_job(job))
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-sent events with the job each time its state changes
+    
+    The stream ends after JOBS_EVENTS_MAX_SECONDS even if the job has not
+    finished; EventSource clients reconnect and pick up its current state.
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        yield 'retry: 1000\n\n'
+        for job in job_queue.watch(job_id, timeout=JOBS_EVENTS_MAX_SECONDS):
+            if job is None:
+                yield ': keepalive\n\n'
+                continue
+            yield f"event: {job['state']}\ndata: {json.dumps(public_job(job))}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a job that has not started yet
+    """
+    if job_queue.cancel(job_id):
+        return jsonify(public_job(job_queue.get(job_id)))
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'error': f"Job is {job['state']} and can no longer be cancelled"}), 409
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Stage latency histograms and timeout, error, cache and pool counters in Prometheus format
+    """
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint
     """
-    return jsonify({'status': 'healthy', 'service': 'ocr'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'ocr',
+        'tesseract': tesseract_pool.stats(),
+        'decode': dict(image_decoder.settings(), budget=image_decoder.budget.stats()),
+        'cache': ocr_cache.stats(),
+        'jobs': job_queue.stats()
+    })
+
+def shutdown():
+    """
+    Stop the batch process pool and release Tesseract engines before the process exits
+    """
+    job_queue.close()
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=True, cancel_futures=True)
+    tesseract_pool.close()
 
 if __name__ == '__main__':
+    job_queue.start()
     port = int(os.environ.get('PORT', 5001))
     app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true')
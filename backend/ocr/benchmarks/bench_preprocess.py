@@ -0,0 +1,118 @@
+"""
+Benchmark: full-resolution Otsu preprocessing vs adaptive preprocessing.
+
+Run from backend/ocr:
+
+    python benchmarks/bench_preprocess.py [--images 10] [--size 4000x3000]
+
+Renders phone-sized part labels with known text (skewed, some with uneven
+lighting) and reports, per mode, preprocessing time, OCR time, the pixels
+handed to Tesseract and character accuracy against the label text. Without
+a tesseract binary only the preprocessing columns are filled in.
+"""
+import os
+import io
+import sys
+import time
+import shutil
+import argparse
+import difflib
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import TesseractPool  # noqa: E402
+from preprocess import Preprocessor  # noqa: E402
+from benchmarks.label_fixtures import LABELS, render_label  # noqa: E402
+
+
+def legacy_preprocess(image):
+    # The original pipeline: Otsu and a 3x3 open over the whole photo
+    thresh = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    return [cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=1)]
+
+
+def label_corpus(count, size):
+    """
+    ``[(gray_image, expected_text), ...]`` with a spread of skews and lighting
+    """
+    corpus = []
+    for index in range(count):
+        lines = LABELS[index % len(LABELS)]
+        image = Image.open(io.BytesIO(render_label(lines, size=size, seed=index)))
+        image = image.rotate((index % 5 - 2) * 3, fillcolor=220, resample=Image.BICUBIC)
+        gray = np.asarray(image)
+        if index % 2:
+            # Light falling off towards one side of the photo
+            shade = np.linspace(0.45, 1.0, gray.shape[1], dtype=np.float32)[None, :]
+            gray = (gray * shade).astype(np.uint8)
+        corpus.append((gray, '\n'.join(lines)))
+    return corpus
+
+
+def accuracy(text, expected):
+    return difflib.SequenceMatcher(None, ' '.join(text.split()), ' '.join(expected.split())).ratio()
+
+
+def run(name, corpus, preprocess, recognise):
+    prep_seconds = ocr_seconds = 0.0
+    pixels = 0
+    scores = []
+    for gray, expected in corpus:
+        started = time.perf_counter()
+        regions = preprocess(gray)
+        prep_seconds += time.perf_counter() - started
+        pixels += sum(region.size for region in regions)
+        if recognise is not None:
+            started = time.perf_counter()
+            text = '\n'.join(recognise(region) for region in regions)
+            ocr_seconds += time.perf_counter() - started
+            scores.append(accuracy(text, expected))
+    count = len(corpus)
+    return {
+        'mode': name,
+        'prep_ms': prep_seconds / count * 1000,
+        'ocr_ms': ocr_seconds / count * 1000 if recognise is not None else None,
+        'megapixels': pixels / count / 1e6,
+        'accuracy': sum(scores) / len(scores) if scores else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=10)
+    parser.add_argument('--size', default='4000x3000')
+    args = parser.parse_args()
+
+    size = tuple(int(value) for value in args.size.lower().split('x'))
+    corpus = label_corpus(args.images, size)
+
+    pool = TesseractPool()
+    recognise = pool.image_to_string
+    if not pool.persistent and shutil.which('tesseract') is None:
+        print('tesseract is not installed; reporting preprocessing only')
+        recognise = None
+
+    rows = [
+        run('legacy otsu, full size', corpus, legacy_preprocess, recognise),
+        run('adaptive, crop', corpus, lambda gray: Preprocessor(regions='crop').run(gray)[0], recognise),
+        run('adaptive, blocks', corpus, lambda gray: Preprocessor(regions='blocks').run(gray)[0], recognise),
+    ]
+
+    def cell(value, fmt):
+        return format(value, fmt) if value is not None else format('-', '>10')
+
+    print(f"{'mode':<24}{'prep ms':>10}{'ocr ms':>10}{'MP to OCR':>11}{'accuracy':>10}")
+    for row in rows:
+        print(
+            f"{row['mode']:<24}{row['prep_ms']:>10.1f}{cell(row['ocr_ms'], '>10.1f')}"
+            f"{row['megapixels']:>11.2f}{cell(row['accuracy'], '>10.3f')}"
+        )
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
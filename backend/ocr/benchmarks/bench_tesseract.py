@@ -0,0 +1,72 @@
+"""
+Benchmark: a pytesseract subprocess per image vs warm TesseractPool engines.
+
+Run from backend/ocr:
+
+    python benchmarks/bench_tesseract.py [--images 10] [--rounds 3]
+
+Reports images/sec for pytesseract (sequential), the pool used
+sequentially, and the pool driven by one thread per engine.
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import pytesseract
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import decode_image, preprocess_image  # noqa: E402
+from engine import TesseractPool  # noqa: E402
+from benchmarks.label_fixtures import load_fixtures  # noqa: E402
+
+
+def throughput(images, rounds, recognise, workers=1):
+    started = time.perf_counter()
+    texts = []
+    for _ in range(rounds):
+        if workers == 1:
+            texts = [recognise(image) for image in images]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                texts = list(executor.map(recognise, images))
+    elapsed = time.perf_counter() - started
+    return len(images) * rounds / elapsed, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    images = [
+        region
+        for _, data in load_fixtures(args.images)
+        for region in preprocess_image(decode_image(data))[0]
+    ]
+    pool = TesseractPool()
+    if not pool.persistent:
+        print('tesserocr is not installed; the pool falls back to pytesseract and both rows will match')
+
+    # Load every engine before timing so the pool rows measure warm engines
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        list(executor.map(pool.image_to_string, images[:pool.size]))
+
+    rows = [
+        ('pytesseract subprocess', *throughput(images, args.rounds, pytesseract.image_to_string)),
+        ('pool, 1 thread', *throughput(images, args.rounds, pool.image_to_string)),
+        (f"pool, {pool.size} threads", *throughput(images, args.rounds, pool.image_to_string, pool.size)),
+    ]
+
+    baseline_texts = rows[0][2]
+    print(f"{'mode':<26}{'images/sec':>12}{'speedup':>10}  text")
+    for name, rate, texts in rows:
+        same = sum(a.strip() == b.strip() for a, b in zip(baseline_texts, texts))
+        print(f"{name:<26}{rate:>12.2f}{rate / rows[0][1]:>9.1f}x  {same}/{len(texts)} identical")
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
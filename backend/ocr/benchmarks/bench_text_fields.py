@@ -0,0 +1,102 @@
+"""
+Benchmark: per-term regex search vs the Aho-Corasick field extractor.
+
+Run from backend/ocr:
+
+    python benchmarks/bench_text_fields.py [--texts 200] [--sizes 10,100,1000,10000,100000]
+
+Grows the vocabulary with synthetic terms and reports texts/sec for the
+original process_text loop (one re.search per term) and for
+TextFieldExtractor. The extractor should stay roughly flat as the
+vocabulary grows; the legacy loop is skipped past --legacy-max terms.
+"""
+import os
+import re
+import sys
+import time
+import random
+import string
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import TextFieldExtractor, Vocabulary, ahocorasick  # noqa: E402
+from benchmarks.label_fixtures import LABELS  # noqa: E402
+
+
+def legacy_process_text(text, common_makes):
+    # The original implementation, with the vocabulary passed in
+    processed_text = re.sub(r'\s+', ' ', text).strip()
+    part_numbers = re.findall(r'[A-Z0-9]{5,}', processed_text)
+    vehicle_makes = []
+    for make in common_makes:
+        if re.search(r'\b' + make + r'\b', processed_text, re.IGNORECASE):
+            vehicle_makes.append(make)
+    dimensions = re.findall(r'\b\d+(\.\d+)?[xX]\d+(\.\d+)?([xX]\d+(\.\d+)?)?\b', processed_text)
+    weights = re.findall(r'\b\d+(\.\d+)?\s*(kg|g|lb|oz|pound|ounce)\b', processed_text, re.IGNORECASE)
+    prices = re.findall(r'\$\s*\d+(\.\d{2})?', processed_text)
+    return processed_text, {
+        'part_numbers': part_numbers,
+        'vehicle_makes': vehicle_makes,
+        'dimensions': [d[0] for d in dimensions],
+        'weights': [f"{w[0]} {w[1]}" for w in weights],
+        'prices': prices
+    }
+
+
+def synthetic_terms(count, rng):
+    terms = set()
+    while len(terms) < count:
+        terms.add(''.join(rng.choice(string.ascii_letters) for _ in range(rng.randint(4, 12))))
+    return sorted(terms)
+
+
+def ocr_texts(count, rng):
+    # Label text with OCR-style noise lines, roughly the size of one photo's output
+    texts = []
+    for index in range(count):
+        lines = list(LABELS[index % len(LABELS)])
+        for _ in range(20):
+            lines.append(' '.join(
+                ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(2, 9)))
+                for _ in range(rng.randint(3, 8))
+            ))
+        rng.shuffle(lines)
+        texts.append('\n'.join(lines))
+    return texts
+
+
+def throughput(texts, func):
+    started = time.perf_counter()
+    for text in texts:
+        func(text)
+    return len(texts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--texts', type=int, default=200)
+    parser.add_argument('--sizes', default='10,100,1000,10000,100000')
+    parser.add_argument('--legacy-max', type=int, default=10000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = ocr_texts(args.texts, rng)
+    base = ['Toyota', 'Honda', 'Ford', 'Chevrolet', 'BMW', 'Mercedes', 'Audi', 'Nissan', 'Hyundai', 'Kia']
+    print(f"automaton: {'pyahocorasick' if ahocorasick is not None else 'pure Python'}; "
+          f"{len(texts)} texts of ~{sum(map(len, texts)) // len(texts)} chars")
+
+    print(f"{'terms':>8}{'legacy/s':>12}{'extractor/s':>14}{'speedup':>10}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        terms = base + synthetic_terms(max(size - len(base), 0), rng)
+        extractor = TextFieldExtractor(Vocabulary({'vehicle_makes': terms}))
+        fast = throughput(texts, extractor.extract)
+        if size <= args.legacy_max:
+            legacy = throughput(texts, lambda text: legacy_process_text(text, terms))
+            print(f"{size:>8}{legacy:>12.1f}{fast:>14.1f}{fast / legacy:>9.1f}x")
+        else:
+            print(f"{size:>8}{'-':>12}{fast:>14.1f}{'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Shared plumbing for the benchmark suites: timing, percentiles, peak RSS,
+process isolation and the JSON report format.
+
+Each benchmark runs in a freshly spawned interpreter so its peak RSS and
+warm-up are its own. A report looks like:
+
+    {
+      "service": "scraper",
+      "commit": "0d98a11",
+      "created_at": "2024-01-01T00:00:00+00:00",
+      "environment": {"python": "3.11.7", "platform": "...", "cpus": 8},
+      "config": {...},
+      "benchmarks": {
+        "search_general": {
+          "unit": "query", "count": 20, "seconds": 1.9, "throughput": 10.5,
+          "latency_ms": {"mean": 95.1, "p50": 93.0, "p90": 110.2, "p99": 131.7, "max": 133.0},
+          "peak_rss_mb": 88.4, ...
+        },
+        "extract_text": {"skipped": "tesseract is not installed"}
+      }
+    }
+"""
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import subprocess
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, pct):
+    """
+    Linearly interpolated percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def measure(func, inputs, unit='call', warmup=1, concurrency=1):
+    """
+    Call ``func`` once per input and return throughput and latency percentiles.
+
+    The first ``warmup`` inputs are run untimed beforehand so lazy imports,
+    sessions and caches do not land in the first sample. With
+    ``concurrency`` above 1 the calls are spread over that many threads.
+    """
+    for value in inputs[:warmup]:
+        func(value)
+
+    def timed(value):
+        call_started = time.perf_counter()
+        func(value)
+        return time.perf_counter() - call_started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(timed, inputs))
+    else:
+        latencies = [timed(value) for value in inputs]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'unit': unit,
+        'count': len(latencies),
+        'seconds': round(elapsed, 4),
+        'throughput': round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p90': round(percentile(latencies, 90) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def process_tree_rss_mb(pid=None):
+    """
+    Current RSS of ``pid`` (default: this process) and all its descendants,
+    such as browser processes; Linux only, 0.0 elsewhere
+    """
+    pid = pid or os.getpid()
+    parents = {}
+    rss = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces; fields resume after its ')'
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            parents[int(entry)] = int(fields[1])
+            rss[int(entry)] = int(fields[21]) * resource.getpagesize()
+    except OSError:
+        return 0.0
+
+    tree = {pid}
+    grew = True
+    while grew:
+        children = {child for child, parent in parents.items() if parent in tree} - tree
+        grew = bool(children)
+        tree |= children
+    return round(sum(rss.get(member, 0) for member in tree) / (1024 * 1024), 1)
+
+
+def _run_and_report_rss(func, kwargs):
+    result = func(**kwargs)
+    result.setdefault('peak_rss_mb', peak_rss_mb())
+    return result
+
+
+def run_isolated(func, **kwargs):
+    """
+    Run ``func(**kwargs)`` in a freshly spawned interpreter and return its
+    result dict with the child's peak RSS added
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(_run_and_report_rss, (func, kwargs))
+
+
+def git_commit(path):
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=path, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def build_report(service, config, benchmarks, path):
+    return {
+        'service': service,
+        'commit': git_commit(path),
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'config': config,
+        'benchmarks': benchmarks,
+    }
+
+
+def write_report(report, output):
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def print_summary(report):
+    print(f"{'benchmark':<28}{'count':>7}{'per sec':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'RSS MB':>9}")
+    for name, result in report['benchmarks'].items():
+        if 'skipped' in result:
+            print(f"{name:<28}  skipped: {result['skipped']}")
+            continue
+        latency = result['latency_ms']
+        print(
+            f"{name:<28}{result['count']:>7}{result['throughput']:>10.2f}{latency['p50']:>10.2f}"
+            f"{latency['p90']:>10.2f}{latency['p99']:>10.2f}{result['peak_rss_mb']:>9.1f}"
+        )
+
+
+def compare(report, baseline_path, threshold=0.1):
+    """
+    Print how each benchmark moved against a previous report and return the
+    names whose throughput, p99 latency or peak RSS got worse by more than
+    ``threshold``
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nagainst {baseline.get('commit', '?')} ({baseline_path}):")
+    print(f"{'benchmark':<28}{'throughput':>12}{'p99':>10}{'RSS':>10}")
+
+    def change(new, old):
+        return (new - old) / old if old else 0.0
+
+    regressions = []
+    for name, result in report['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous or 'skipped' in result or 'skipped' in previous:
+            continue
+        throughput = change(result['throughput'], previous['throughput'])
+        p99 = change(result['latency_ms']['p99'], previous['latency_ms']['p99'])
+        rss = change(result['peak_rss_mb'], previous['peak_rss_mb'])
+        worse = throughput < -threshold or p99 > threshold or rss > threshold
+        if worse:
+            regressions.append(name)
+        print(f"{name:<28}{throughput:>+11.1%}{p99:>+10.1%}{rss:>+10.1%}{'  REGRESSION' if worse else ''}")
+    return regressions
@@ -0,0 +1,75 @@
+"""
+Label image fixtures for the OCR benchmarks.
+
+Real photos placed in benchmarks/fixtures/ (png, jpg, tiff, bmp) are used
+as-is; synthetic part labels are rendered on top so every run has a
+corpus even on a fresh checkout.
+"""
+import os
+import io
+import random
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+LABELS = [
+    ['BOSCH', 'Part No. 0986AF6031', 'Oil Filter', 'for Toyota Camry 2012-2017', 'Weight 0.45 kg'],
+    ['DENSO', 'ALT-1180 Alternator', '130A 12V', 'for Honda Accord 2.4L', '7.9x6.2x8.4 in'],
+    ['ACDelco', '41-110 Spark Plug', 'Iridium', 'Chevrolet Silverado', '$12.99'],
+    ['MOTORCRAFT', 'FL820S', 'for Ford F-150 5.0L', 'Made in USA', 'Net wt 1.2 lb'],
+    ['BREMBO', 'BR-55091 Front Rotor', 'for BMW 328i', '11.65x11.65x1.10', '$64.99'],
+]
+
+
+def _font(size):
+    for name in ('DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf', 'Arial.ttf'):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def render_label(lines, size=(1600, 1000), seed=0):
+    """
+    Render a photographed-looking part label and return it as PNG bytes
+    """
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new('L', size, color=rng.randint(200, 235))
+    draw = ImageDraw.Draw(image)
+
+    # A white label on a grey background, like a box photographed on a shelf
+    left, top = width // 8, height // 6
+    draw.rectangle([left, top, width - left, height - top], fill=250, outline=40, width=4)
+
+    font = _font(max(height // 16, 12))
+    y = top + height // 20
+    for line in lines:
+        draw.text((left + width // 20, y), line, fill=rng.randint(0, 40), font=font)
+        y += int(height / 9)
+
+    image = image.rotate(rng.uniform(-3, 3), fillcolor=220, resample=Image.BICUBIC)
+    image = image.filter(ImageFilter.GaussianBlur(radius=0.6))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def load_fixtures(count=10, size=(1600, 1000)):
+    """
+    Return ``[(name, image_bytes), ...]``: saved fixtures first, then synthetic labels
+    """
+    fixtures = []
+    if os.path.isdir(FIXTURES_DIR):
+        for name in sorted(os.listdir(FIXTURES_DIR)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                    fixtures.append((name, f.read()))
+
+    for index in range(max(count - len(fixtures), 0)):
+        lines = LABELS[index % len(LABELS)]
+        fixtures.append((f"synthetic_{index:02d}.png", render_label(lines, size=size, seed=index)))
+    return fixtures
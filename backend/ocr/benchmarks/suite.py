@@ -0,0 +1,163 @@
+"""
+Offline benchmark suite for the OCR service: decode_image, preprocess_image,
+extract_text and process_text on the label image corpus.
+
+Run from backend/ocr:
+
+    python benchmarks/suite.py [--images 20] [--size 1600x1000] [--texts 500]
+                               [--output benchmarks/results/ocr-<commit>.json]
+                               [--baseline previous.json] [--only preprocess_image,...]
+
+The corpus is every image in benchmarks/fixtures/ plus synthetic labels
+(see label_fixtures.py). extract_text is skipped when neither tesserocr
+nor the tesseract binary is available; process_text runs on label text
+with OCR-style noise so it does not depend on Tesseract. decode_image runs
+each label through the frame decoder as PNG, as JPEG and as one
+multi-page TIFF, within the decoder's pixel limit and budget.
+
+Each benchmark runs in its own interpreter and the report (throughput,
+latency percentiles and peak RSS per benchmark) is written as JSON; with
+--baseline the run is compared against an earlier report and the exit
+status is 1 if anything regressed by more than --threshold.
+"""
+import io
+import os
+import sys
+import random
+import shutil
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import harness  # noqa: E402
+
+BENCHMARKS = ('decode_image', 'preprocess_image', 'extract_text', 'process_text')
+
+
+def decoded_corpus(images, size):
+    from app import decode_image
+    from benchmarks.label_fixtures import load_fixtures
+
+    return [decode_image(data) for _, data in load_fixtures(images, size)]
+
+
+def encoded_corpus(images, size):
+    from PIL import Image
+    from benchmarks.label_fixtures import load_fixtures
+
+    pngs = [data for _, data in load_fixtures(images, size)]
+    labels = [Image.open(io.BytesIO(data)).convert('RGB') for data in pngs]
+    buffer = io.BytesIO()
+    labels[0].save(buffer, format='TIFF', save_all=True, append_images=labels[1:])
+    corpus = pngs + [buffer.getvalue()]
+    for label in labels:
+        buffer = io.BytesIO()
+        label.save(buffer, format='JPEG', quality=90)
+        corpus.append(buffer.getvalue())
+    return corpus
+
+
+def bench_decode_image(images, size):
+    from app import image_decoder, shutdown
+
+    frames = []
+
+    def run(data):
+        for image, _ in image_decoder.frames(data):
+            frames.append(image.shape[0] * image.shape[1])
+
+    result = harness.measure(run, encoded_corpus(images, size), unit='file')
+    result['frames'] = len(frames)
+    result['megapixels'] = round(sum(frames) / len(frames) / 1e6, 2)
+    shutdown()
+    return result
+
+
+def bench_preprocess_image(images, size):
+    from app import preprocess_image, shutdown
+
+    corpus = decoded_corpus(images, size)
+    result = harness.measure(preprocess_image, corpus, unit='image')
+    result['megapixels'] = round(sum(image.shape[0] * image.shape[1] for image in corpus) / len(corpus) / 1e6, 2)
+    shutdown()
+    return result
+
+
+def bench_extract_text(images, size):
+    import pytesseract
+    from app import extract_text, tesseract_pool, shutdown
+
+    if not tesseract_pool.persistent and shutil.which(pytesseract.pytesseract.tesseract_cmd) is None:
+        return {'skipped': 'tesseract is not installed'}
+
+    result = harness.measure(extract_text, decoded_corpus(images, size), unit='image')
+    result['engine'] = 'tesserocr' if tesseract_pool.persistent else 'pytesseract'
+    shutdown()
+    return result
+
+
+def bench_process_text(texts):
+    from app import process_text, text_extractor, shutdown
+    from benchmarks.bench_text_fields import ocr_texts
+
+    result = harness.measure(process_text, ocr_texts(texts, random.Random(0)), unit='text')
+    result['vocabulary_terms'] = text_extractor.vocabulary.size
+    shutdown()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--size', default='1600x1000')
+    parser.add_argument('--texts', type=int, default=500)
+    parser.add_argument('--only', help='comma-separated benchmarks to run')
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    selected = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    size = tuple(int(value) for value in args.size.lower().split('x'))
+
+    # Read by app.py in each spawned benchmark process
+    work_dir = tempfile.mkdtemp(prefix='ocr-bench-')
+    os.environ['JOBS_DB_PATH'] = os.path.join(work_dir, 'jobs.db')
+    os.environ.pop('OCR_CACHE_PATH', None)
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    runs = {
+        'decode_image': lambda: harness.run_isolated(bench_decode_image, images=args.images, size=size),
+        'preprocess_image': lambda: harness.run_isolated(bench_preprocess_image, images=args.images, size=size),
+        'extract_text': lambda: harness.run_isolated(bench_extract_text, images=args.images, size=size),
+        'process_text': lambda: harness.run_isolated(bench_process_text, texts=args.texts),
+    }
+
+    results = {}
+    for name in selected:
+        print(f"running {name}...", file=sys.stderr)
+        results[name] = runs[name]()
+
+    config = {
+        'images': args.images,
+        'size': args.size,
+        'texts': args.texts,
+    }
+    report = harness.build_report('ocr', config, results, ROOT)
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"ocr-{report['commit']}.json")
+    harness.write_report(report, output)
+    harness.print_summary(report)
+    print(f"\nwrote {output}")
+
+    if args.baseline:
+        return 1 if harness.compare(report, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
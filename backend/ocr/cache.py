@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(data, config):
+    """
+    Cache key for image bytes processed under a given OCR configuration
+    """
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SQLiteStore:
+    """
+    On-disk result store that evicts least recently used rows past ``max_bytes``
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._conn.commit()
+        self.evictions = 0
+
+    @property
+    def _conn(self):
+        # Connections must not cross a fork (gunicorn --preload), so each process opens its own
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ocr_cache_used_at ON ocr_cache (used_at)')
+            conn.commit()
+            self._connection = conn
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM ocr_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE ocr_cache SET used_at = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        encoded = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO ocr_cache (key, value, size, used_at) VALUES (?, ?, ?, ?)',
+                (key, encoded, len(encoded), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute('SELECT key, size FROM ocr_cache ORDER BY used_at').fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute('DELETE FROM ocr_cache WHERE key = ?', (key,))
+            total -= size
+            self.evictions += 1
+
+    def size_bytes(self):
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache').fetchone()[0]
+
+
+class OCRCache:
+    """
+    Content-addressed cache of OCR payloads.
+
+    Keys are a SHA-256 of the image bytes plus the preprocessing and OCR
+    configuration, so a re-uploaded photo is answered without decoding it,
+    and changing the pipeline configuration never serves stale text. Entries
+    live in a bounded in-memory LRU, optionally backed by SQLite with
+    size-based eviction.
+    """
+
+    def __init__(self, max_entries=512, path=None, max_disk_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.store = SQLiteStore(path, max_disk_bytes) if path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return value
+
+        value = self.store.get(key) if self.store is not None else None
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.store is not None:
+            try:
+                self.store.set(key, value)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing OCR cache entry: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        if self.store is not None:
+            stats['disk_bytes'] = self.store.size_bytes()
+            stats['disk_evictions'] = self.store.evictions
+        return stats
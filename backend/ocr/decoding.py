@@ -0,0 +1,262 @@
+import io
+import os
+import math
+import mmap
+import time
+import logging
+import threading
+from contextlib import contextmanager
+import cv2
+import numpy as np
+from PIL import Image
+import metrics
+
+logger = logging.getLogger(__name__)
+
+OVERSIZE_MODES = ('downsize', 'reject')
+
+# Werkzeug keeps uploads up to this size in memory and spools larger ones to a temporary file
+SPOOL_BYTES = 500 * 1024
+
+# libjpeg can scale by 1/2, 1/4 and 1/8 while decoding, so the full-size
+# bitmap is never allocated; for other formats OpenCV decodes in full first
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Sizes are checked against the decoder's own limits from the header, before
+# any pixels are decoded; PIL's decompression-bomb guard would refuse large
+# JPEGs that can be decoded at reduced size
+Image.MAX_IMAGE_PIXELS = None
+
+
+class ImageTooLarge(ValueError):
+    """
+    Raised for an image over the pixel limit (with oversize='reject') or one
+    that cannot be decoded within the worker's pixel budget at all
+    """
+
+
+class BudgetExhausted(RuntimeError):
+    """
+    Raised when a frame waits too long for other requests to release pixel budget
+    """
+
+
+class PixelBudget:
+    """
+    Decoded pixels a worker process may hold at once.
+
+    Each frame reserves its pixel count while it is decoded and recognised.
+    When concurrent requests (server threads, job runners) would take the
+    worker past ``total``, the next frame waits up to ``wait`` seconds for
+    the others to finish and then fails with BudgetExhausted, so a burst of
+    large uploads queues instead of running the container out of memory.
+    """
+
+    def __init__(self, total, wait=30):
+        self.total = total
+        self.wait = wait
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._pid = os.getpid()
+        self._stats = {'reservations': 0, 'waits': 0, 'exhausted': 0, 'peak_pixels': 0}
+
+    def _reset_after_fork(self):
+        # Reservations held by the parent's threads are not ours
+        if self._pid != os.getpid():
+            with self._condition:
+                self._in_use = 0
+                self._pid = os.getpid()
+
+    @contextmanager
+    def reserve(self, pixels):
+        if pixels > self.total:
+            raise ImageTooLarge(
+                f"Image needs {pixels / 1e6:.1f} MP to decode; the worker's budget is {self.total / 1e6:.1f} MP"
+            )
+        self._reset_after_fork()
+        started = time.perf_counter()
+        with self._condition:
+            saturated = self._in_use + pixels > self.total
+            if not self._condition.wait_for(lambda: self._in_use + pixels <= self.total, timeout=self.wait):
+                self._stats['exhausted'] += 1
+                raise BudgetExhausted(f"Timed out after {self.wait}s waiting for {pixels / 1e6:.1f} MP of pixel budget")
+            self._in_use += pixels
+            self._stats['reservations'] += 1
+            self._stats['waits'] += int(saturated)
+            self._stats['peak_pixels'] = max(self._stats['peak_pixels'], self._in_use)
+        metrics.pool_checkout('pixels', time.perf_counter() - started, saturated)
+        metrics.POOL_IN_USE.labels('pixels').inc(pixels)
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_use -= pixels
+                self._condition.notify_all()
+            metrics.POOL_IN_USE.labels('pixels').dec(pixels)
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats['in_use_pixels'] = self._in_use
+        stats['total_pixels'] = self.total
+        return stats
+
+
+class ImageDecoder:
+    """
+    Decode uploads into grayscale arrays one frame at a time.
+
+    OCR only needs luminance, so frames are decoded straight to one byte per
+    pixel. The header is read first, so an image's size is known before any
+    pixels are allocated: a frame over ``max_pixels`` is rejected or, with
+    ``oversize='downsize'``, scaled down to the limit. JPEGs are decoded at
+    1/2, 1/4 or 1/8 size when that is still above the limit. Multi-page TIFFs
+    and animated GIFs are yielded frame by frame, at most ``max_frames`` of
+    them, so only the frame being recognised is held in memory.
+    """
+
+    def __init__(self, max_pixels=24_000_000, oversize='downsize', max_frames=20, budget=None):
+        if oversize not in OVERSIZE_MODES:
+            raise ValueError(f"Unknown oversize mode {oversize!r}")
+        self.max_pixels = max_pixels
+        self.oversize = oversize
+        self.max_frames = max_frames
+        self.budget = budget or PixelBudget(max_pixels * 2)
+
+    def settings(self):
+        return {
+            'max_pixels': self.max_pixels,
+            'oversize': self.oversize,
+            'max_frames': self.max_frames,
+        }
+
+    def _open(self, data):
+        if isinstance(data, mmap.mmap):
+            data.seek(0)
+            source = data
+        else:
+            source = io.BytesIO(data)
+        try:
+            return Image.open(source)
+        except Exception:
+            raise ValueError('Could not decode image')
+
+    def _scale(self, width, height):
+        pixels = width * height
+        if pixels <= self.max_pixels:
+            return 1.0
+        if self.oversize == 'reject':
+            raise ImageTooLarge(
+                f"Image is {width}x{height} ({pixels / 1e6:.1f} MP); the limit is {self.max_pixels / 1e6:.1f} MP"
+            )
+        return math.sqrt(self.max_pixels / pixels)
+
+    def check(self, data):
+        """
+        Raise ValueError (ImageTooLarge for size) if ``data`` would be refused,
+        reading only the header; for checks before an upload is queued
+        """
+        with self._open(data) as source:
+            self._scale(*source.size)
+
+    def frames(self, data):
+        """
+        Yield ``(image, info)`` for each frame of ``data``, decoding a frame
+        only when the caller asks for it. The frame's pixel budget is held
+        until the next one is requested or the generator is closed.
+        """
+        with self._open(data) as source:
+            count = getattr(source, 'n_frames', 1)
+            if count > 1:
+                yield from self._sequence(source, count)
+            else:
+                yield from self._single(data, source)
+
+    def _single(self, data, source):
+        width, height = source.size
+        scale = self._scale(width, height)
+        factor = 1
+        if source.format == 'JPEG':
+            # The largest libjpeg reduction that still leaves at least the target size
+            factor = max(f for f in REDUCED_FLAGS if f == 1 or 1 / f >= scale)
+            # One step further if that would not fit the worker's budget
+            while factor < 8 and math.ceil(width / factor) * math.ceil(height / factor) > self.budget.total:
+                factor *= 2
+
+        with self.budget.reserve(math.ceil(width / factor) * math.ceil(height / factor)):
+            with metrics.stage('decode'):
+                image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), REDUCED_FLAGS[factor])
+                if image is None:
+                    # OpenCV builds without GIF support; PIL decodes the frame instead
+                    image = _from_pil(source, scale)
+                else:
+                    image = _fit(image, self.max_pixels)
+            yield image, _info(0, 1, width, height, image)
+
+    def _sequence(self, source, count):
+        if count > self.max_frames:
+            logger.warning(f"Image has {count} frames; only the first {self.max_frames} are processed")
+        for index in range(min(count, self.max_frames)):
+            source.seek(index)
+            width, height = source.size
+            scale = self._scale(width, height)
+            with self.budget.reserve(width * height):
+                with metrics.stage('decode'):
+                    image = _from_pil(source, scale)
+                yield image, _info(index, count, width, height, image)
+
+
+def _from_pil(frame, scale):
+    gray = frame.convert('L')
+    if scale < 1:
+        width, height = frame.size
+        gray = gray.resize((max(int(width * scale), 1), max(int(height * scale), 1)), Image.Resampling.BOX)
+    return np.asarray(gray)
+
+
+def _fit(image, max_pixels):
+    height, width = image.shape[:2]
+    if height * width <= max_pixels:
+        return image
+    scale = math.sqrt(max_pixels / (height * width))
+    return cv2.resize(image, (max(int(width * scale), 1), max(int(height * scale), 1)), interpolation=cv2.INTER_AREA)
+
+
+def _info(index, count, width, height, image):
+    return {
+        'frame': index,
+        'frames': count,
+        'original_size': [width, height],
+        'decoded_size': [image.shape[1], image.shape[0]],
+    }
+
+
+@contextmanager
+def upload_buffer(stream):
+    """
+    The bytes of an uploaded file. Uploads Werkzeug spooled to disk are
+    memory-mapped rather than read, so a large upload is never copied onto
+    the heap; small ones are read as usual.
+    """
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    mapped = None
+    if size > SPOOL_BYTES:
+        try:
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            mapped = None
+    if mapped is None:
+        yield stream.read()
+        return
+    try:
+        yield mapped
+    finally:
+        mapped.close()
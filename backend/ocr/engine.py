@@ -0,0 +1,140 @@
+import os
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pytesseract
+import metrics
+
+try:
+    import tesserocr
+except ImportError:  # pragma: no cover - depends on the image having libtesseract
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+
+class TesseractPool:
+    """
+    Pool of warm, long-lived Tesseract engines.
+
+    Each engine is a tesserocr ``PyTessBaseAPI`` that keeps its language
+    model loaded, so recognising an image costs one ``SetImage`` and one
+    ``GetUTF8Text`` instead of forking a ``tesseract`` process. Engines are
+    created lazily, at most ``size`` of them, and checked out one per
+    recognition. If tesserocr is not installed the pool falls back to
+    pytesseract's subprocess per image.
+    """
+
+    def __init__(self, size=None, lang='eng', tessdata=None):
+        self.size = size or os.cpu_count() or 1
+        self.lang = lang
+        self.tessdata = tessdata
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._pid = os.getpid()
+
+    @property
+    def persistent(self):
+        return tesserocr is not None
+
+    def _reset_after_fork(self):
+        # Engines must not be shared across a fork; start afresh in the child
+        if self._pid != os.getpid():
+            with self._lock:
+                self._idle = queue.LifoQueue()
+                self._created = 0
+                self._pid = os.getpid()
+
+    def _create(self):
+        kwargs = {'lang': self.lang}
+        if self.tessdata:
+            kwargs['path'] = self.tessdata
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    @contextmanager
+    def checkout(self):
+        self._reset_after_fork()
+        started = time.perf_counter()
+        saturated = False
+        while True:
+            try:
+                api = self._idle.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    api = self._create()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                break
+            # Every engine is busy; wait for one to come back, re-checking in
+            # case the one we wait for fails and is ended instead of returned
+            saturated = True
+            try:
+                api = self._idle.get(timeout=1.0)
+                break
+            except queue.Empty:
+                continue
+        metrics.pool_checkout('tesseract', time.perf_counter() - started, saturated)
+        metrics.POOL_IN_USE.labels('tesseract').inc()
+
+        try:
+            yield api
+        except Exception:
+            # An engine that failed mid-recognition is not trusted again
+            api.End()
+            with self._lock:
+                self._created -= 1
+            raise
+        else:
+            api.Clear()
+            self._idle.put(api)
+        finally:
+            metrics.POOL_IN_USE.labels('tesseract').dec()
+
+    def image_to_string(self, image):
+        """
+        Recognise text in a grayscale or BGR uint8 NumPy array
+        """
+        if not self.persistent:
+            return pytesseract.image_to_string(image, lang=self.lang)
+
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        if bytes_per_pixel == 3:
+            # Tesseract expects RGB channel order
+            image = np.ascontiguousarray(image[:, :, ::-1])
+
+        with self.checkout() as api:
+            api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+            return api.GetUTF8Text()
+
+    def close(self):
+        while True:
+            try:
+                api = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            api.End()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        return {
+            'persistent': self.persistent,
+            'size': self.size,
+            'engines': self._created,
+            'idle': self._idle.qsize(),
+        }
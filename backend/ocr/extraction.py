@@ -0,0 +1,211 @@
+import os
+import re
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - falls back to the pure-Python automaton
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'vocabulary.json')
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Pattern fields, compiled once. Groups are non-capturing so every match is
+# the full span of text.
+PATTERN_FIELDS = [
+    ('part_numbers', re.compile(r'[A-Z0-9]{5,}')),
+    ('dimensions', re.compile(r'\b\d+(?:\.\d+)?[xX]\d+(?:\.\d+)?(?:[xX]\d+(?:\.\d+)?)?\b')),
+    ('weights', re.compile(r'\b\d+(?:\.\d+)?\s*(?:kg|g|lb|oz|pound|ounce)\b', re.IGNORECASE)),
+    ('prices', re.compile(r'\$\s*\d+(?:\.\d{2})?')),
+]
+
+
+def _fold(text):
+    """
+    Lower-case ``text`` without changing its length, so offsets still line up
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+_NON_WORD = re.compile(r'\W')
+
+
+def _match_form(text):
+    """
+    Fold case and turn every non-word character into a space, keeping offsets.
+
+    Terms are stored as `` term `` in this form, so the automaton only ever
+    reports whole-word matches and "Mercedes-Benz" also matches "Mercedes Benz".
+    """
+    return _NON_WORD.sub(' ', _fold(text))
+
+
+class _Automaton:
+    """
+    Pure-Python Aho-Corasick automaton over folded terms, used when
+    pyahocorasick is not installed
+    """
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+    def add_word(self, word, value):
+        node = 0
+        for char in word:
+            following = self._goto[node].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[node][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = following
+        self._output[node].append(value)
+
+    def make_automaton(self):
+        # Breadth-first so every failure link points at an already linked node
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, following in self._goto[node].items():
+                queue.append(following)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._output[following] = self._output[following] + self._output[self._fail[following]]
+
+    def iter(self, text):
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for value in output[node]:
+                yield index, value
+
+
+class Vocabulary:
+    """
+    Every term of every category in one Aho-Corasick automaton.
+
+    Matching walks the text once regardless of how many terms are loaded.
+    Matches are case-insensitive, must start and end on word boundaries, and
+    overlapping matches resolve to the leftmost, then longest, term, so
+    "Mercedes-Benz" wins over "Mercedes".
+    """
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.fingerprint = hashlib.sha256(json.dumps(categories, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        self._automaton = ahocorasick.Automaton() if ahocorasick is not None else _Automaton()
+        terms = {}
+        for category, words in categories.items():
+            for word in words:
+                key = ' '.join(_match_form(word).split())
+                if key:
+                    terms.setdefault(f" {key} ", []).append((category, word.strip(), len(key)))
+        for key, values in terms.items():
+            self._automaton.add_word(key, values)
+        self.size = len(terms)
+        if self.size:
+            self._automaton.make_automaton()
+
+    @classmethod
+    def load(cls, path=VOCABULARY_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def find(self, text):
+        """
+        Return ``(category, term, start, end)`` for each match in ``text``
+        """
+        if not self.size:
+            return []
+
+        # Pad with spaces so terms at either end of the text have their boundaries
+        padded = f" {_match_form(text)} "
+        candidates = []
+        for end, values in self._automaton.iter(padded):
+            for category, term, length in values:
+                # ``end`` is the trailing space; map back to offsets in ``text``
+                start = end - length - 1
+                candidates.append((start, -length, category, term))
+
+        matches = []
+        position = 0
+        for start, negative_length, category, term in sorted(candidates):
+            if start < position:
+                continue
+            position = start - negative_length
+            matches.append((category, term, start, position))
+        return matches
+
+
+class TextFieldExtractor:
+    """
+    Extract part numbers, vehicles, brands, dimensions, weights and prices
+    from OCR text with module-level compiled patterns and one vocabulary
+    automaton.
+    """
+
+    def __init__(self, vocabulary, pattern_fields=None):
+        self.vocabulary = vocabulary
+        self.pattern_fields = pattern_fields or PATTERN_FIELDS
+
+    def extract(self, text):
+        """
+        Return ``(processed_text, extracted_info)``
+
+        ``extracted_info`` maps each field to its matches in order of
+        appearance (vocabulary terms once each, as written in the data file),
+        and ``spans`` lists every match with its offsets in ``processed_text``.
+        """
+        processed_text = _WHITESPACE.sub(' ', text).strip()
+
+        fields = OrderedDict((field, []) for field, _ in self.pattern_fields)
+        for category in self.vocabulary.categories:
+            fields[category] = []
+        spans = []
+
+        for field, pattern in self.pattern_fields:
+            for match in pattern.finditer(processed_text):
+                fields[field].append(match.group())
+                spans.append({'field': field, 'text': match.group(), 'start': match.start(), 'end': match.end()})
+
+        for category, term, start, end in self.vocabulary.find(processed_text):
+            if term not in fields[category]:
+                fields[category].append(term)
+            spans.append({
+                'field': category,
+                'text': processed_text[start:end],
+                'value': term,
+                'start': start,
+                'end': end
+            })
+
+        extracted_info = dict(fields)
+        extracted_info['spans'] = sorted(spans, key=lambda span: (span['start'], span['end']))
+        return processed_text, extracted_info
+
+
+def load_extractor(path=VOCABULARY_PATH):
+    try:
+        vocabulary = Vocabulary.load(path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error loading OCR vocabulary {path}: {str(e)}")
+        vocabulary = Vocabulary({})
+    logger.info(f"Loaded {vocabulary.size} vocabulary terms for OCR text extraction")
+    return TextFieldExtractor(vocabulary)
@@ -0,0 +1,89 @@
+"""
+Gunicorn settings for the OCR service.
+
+OCR is CPU-bound, so the default is one single-threaded worker process per
+core. OpenCV and Tesseract are limited to one thread per worker so workers
+do not compete for the same cores.
+
+    gunicorn app:app
+
+reads this file from the working directory. Every setting can be
+overridden with the environment variables below.
+"""
+import os
+import shutil
+import tempfile
+import multiprocessing
+
+cores = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+
+workers = int(os.environ.get('GUNICORN_WORKERS', cores))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Tesseract's OpenMP threads would multiply with the worker count
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+# Batch pools are per worker; share the cores out rather than give each worker all of them
+os.environ.setdefault('OCR_PROCESSES', str(max(cores // workers, 1)))
+
+# Import cv2, numpy and the vocabulary automaton once in the master and fork
+# workers from it. Tesseract engines, batch pools and SQLite connections are
+# created lazily in each worker.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# A large batch can keep a worker busy for a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# A sync worker cannot report to the arbiter while it serves a request, so
+# job long-polls (?wait=) and event streams must end well inside the timeout
+# or the worker, and the job runner thread in it, is killed mid-stream. They
+# also hold a whole CPU worker while open, so keep them short.
+if worker_class == 'sync':
+    os.environ.setdefault('JOBS_MAX_WAIT', str(max(timeout // 4, 1)))
+    os.environ.setdefault('JOBS_EVENTS_MAX_SECONDS', str(max(timeout // 2, 1)))
+
+# On SIGTERM, stop accepting and let in-flight OCR finish
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers to bound memory growth from OpenCV and Tesseract; the
+# jitter keeps all workers from restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 500))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 50))
+
+# Workers (and their batch processes) write their metrics to files here and
+# /metrics sums them, so a scrape sees every worker rather than whichever
+# one answered. Cleared on each start so counters from a previous run do not
+# carry over.
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ocr-metrics'))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    import cv2
+    cv2.setNumThreads(int(os.environ.get('OPENCV_THREADS', 1)))
+
+
+def post_worker_init(worker):
+    # Job runners belong to the worker, never to the master
+    from app import job_queue
+    job_queue.start()
+
+
+def worker_exit(server, worker):
+    # In-flight requests have drained by now; hand back unfinished jobs, stop the batch pool and engines
+    from app import shutdown
+    shutdown()
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (engines in use) from /metrics
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,433 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ('succeeded', 'failed', 'cancelled')
+
+# Lowest and highest priority a job may be submitted with
+PRIORITY_RANGE = (-100, 100)
+
+
+class QueueFull(Exception):
+    """
+    Raised when a job is submitted while too many jobs are already waiting
+    """
+
+
+class UnknownJobKind(Exception):
+    """
+    Raised when a job is submitted for a kind that has no handler
+    """
+
+
+class JobStore:
+    """
+    SQLite table of jobs, shared by every worker process of the service
+    """
+
+    COLUMNS = ('id', 'kind', 'priority', 'state', 'payload', 'result', 'error', 'owner',
+               'attempts', 'created_at', 'started_at', 'finished_at', 'updated_at')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._conn.commit()
+
+    @property
+    def _conn(self):
+        # Connections must not cross a fork (gunicorn --preload), so each process opens its own
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'id TEXT PRIMARY KEY, kind TEXT NOT NULL, priority INTEGER NOT NULL, state TEXT NOT NULL, '
+                'payload TEXT NOT NULL, data BLOB, result TEXT, error TEXT, owner TEXT, '
+                'attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, started_at REAL, '
+                'finished_at REAL, updated_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (state, priority DESC, created_at)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS runners ('
+                'host TEXT NOT NULL, pid INTEGER NOT NULL, owner TEXT NOT NULL, started_at REAL NOT NULL, '
+                'PRIMARY KEY (host, pid))'
+            )
+            self._connection = conn
+            self._pid = os.getpid()
+        return self._connection
+
+    def _row(self, row):
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def insert(self, job_id, kind, payload, data, priority, now):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, kind, priority, state, payload, data, created_at, updated_at) '
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, priority, json.dumps(payload), data, now, now)
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def claim(self, owner, now):
+        """
+        Atomically move the most urgent queued job to running; return it and its data
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET state = 'running', owner = ?, started_at = ?, updated_at = ?, "
+                'attempts = attempts + 1 '
+                "WHERE id = (SELECT id FROM jobs WHERE state = 'queued' ORDER BY priority DESC, created_at LIMIT 1) "
+                "AND state = 'queued' RETURNING id, kind, payload, data",
+                (owner, now, now)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'data': row[3]}
+
+    def finish(self, job_id, state, result, error, now):
+        with self._lock:
+            self._conn.execute(
+                'UPDATE jobs SET state = ?, result = ?, error = ?, data = NULL, finished_at = ?, updated_at = ? '
+                'WHERE id = ?',
+                (state, json.dumps(result) if result is not None else None, error, now, now, job_id)
+            )
+
+    def cancel(self, job_id, now):
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = 'cancelled', data = NULL, finished_at = ?, updated_at = ? "
+                "WHERE id = ? AND state = 'queued'",
+                (now, now, job_id)
+            )
+        return cursor.rowcount == 1
+
+    def requeue(self, job_id, now):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'queued', owner = NULL, updated_at = ? WHERE id = ? AND state = 'running'",
+                (now, job_id)
+            )
+
+    def running(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, owner, attempts FROM jobs WHERE state = 'running'"
+            ).fetchall()
+
+    def register(self, host, pid, owner, now):
+        """
+        Record ``owner`` as the process now holding ``pid`` on ``host``, replacing
+        whichever earlier process had that pid
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO runners (host, pid, owner, started_at) VALUES (?, ?, ?, ?)',
+                (host, pid, owner, now)
+            )
+
+    def unregister(self, owner):
+        with self._lock:
+            self._conn.execute('DELETE FROM runners WHERE owner = ?', (owner,))
+
+    def runner(self, host, pid):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT owner FROM runners WHERE host = ? AND pid = ?', (host, pid)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def count(self, state):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM jobs WHERE state = ?', (state,)).fetchone()[0]
+
+    def position(self, job):
+        # Queued jobs that will be claimed before this one
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'queued' AND "
+                '(priority > ? OR (priority = ? AND created_at < ?))',
+                (job['priority'], job['priority'], job['created_at'])
+            ).fetchone()[0]
+
+    def purge(self, older_than):
+        with self._lock:
+            self._conn.execute(
+                f"DELETE FROM jobs WHERE state IN ({', '.join('?' * len(TERMINAL_STATES))}) AND finished_at < ?",
+                (*TERMINAL_STATES, older_than)
+            )
+
+
+class JobQueue:
+    """
+    Persistent priority job queue with a bounded pool of runner threads.
+
+    Jobs live in SQLite so they survive a restart and every worker process
+    sees the same queue: runners in any process claim the highest-priority,
+    oldest queued job with one atomic UPDATE. Submitting fails with
+    QueueFull once ``max_queued`` jobs are waiting. Jobs left running by a
+    process that died are queued again (or failed after ``max_attempts``)
+    when the queue starts; owners carry a token made at each start, as pids
+    repeat after a container restart.
+    """
+
+    def __init__(self, path, handlers, workers=2, max_queued=100, poll_interval=0.5,
+                 retention=86400, max_attempts=2, drain_timeout=30):
+        self.store = JobStore(path)
+        self.handlers = dict(handlers)
+        self.workers = workers
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.max_attempts = max_attempts
+        self.drain_timeout = drain_timeout
+
+        self._pid = None
+        self._token = None
+        self._start_lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._changed = threading.Condition()
+        self._active = set()
+        self._purged_at = 0.0
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'requeued': 0,
+        }
+
+    @property
+    def owner(self):
+        return f"{socket.gethostname()}:{os.getpid()}:{self._token}"
+
+    def start(self):
+        """
+        Start this process's runners (once per process) and recover orphaned jobs
+        """
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._token = uuid.uuid4().hex
+            self.store.register(socket.gethostname(), self._pid, self.owner, time.time())
+            self._threads = []
+            self._active = set()
+            self._stopping = threading.Event()
+            self._recover()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"job-runner-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _recover(self):
+        host = socket.gethostname()
+        for job_id, owner, attempts in self.store.running():
+            owner_host, _, rest = (owner or '').partition(':')
+            owner_pid = rest.partition(':')[0]
+            if owner_host != host or not owner_pid.isdigit():
+                continue
+            # The owner's process is gone, or its pid now belongs to a later start
+            if _pid_alive(int(owner_pid)) and self.store.runner(host, int(owner_pid)) == owner:
+                continue
+            if attempts >= self.max_attempts:
+                self.store.finish(job_id, 'failed', None, 'Worker exited while running the job', time.time())
+            else:
+                self.store.requeue(job_id, time.time())
+                self._stats['requeued'] += 1
+            logger.warning(f"Recovered job {job_id} left running by exited worker {owner}")
+
+    def submit(self, kind, payload, data=None, priority=0):
+        if kind not in self.handlers:
+            raise UnknownJobKind(f"Unknown job kind {kind!r}")
+        priority = job_priority(priority)
+        self.start()
+        if self.store.count('queued') >= self.max_queued:
+            self._stats['rejected'] += 1
+            raise QueueFull(f"{self.max_queued} jobs are already queued")
+
+        job_id = uuid.uuid4().hex
+        self.store.insert(job_id, kind, payload, data, priority, time.time())
+        self._stats['submitted'] += 1
+        self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        if job is not None and job['state'] == 'queued':
+            job['position'] = self.store.position(job)
+        return job
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued job; running jobs are left to finish
+        """
+        cancelled = self.store.cancel(job_id, time.time())
+        if cancelled:
+            self._notify()
+        return cancelled
+
+    def wait(self, job_id, timeout):
+        """
+        Return the job once it has finished, or as it stands after ``timeout`` seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['state'] in TERMINAL_STATES or remaining <= 0:
+                return job
+            self._wait_for_change(min(remaining, self.poll_interval))
+
+    def watch(self, job_id, timeout, heartbeat=15):
+        """
+        Yield the job each time its state changes, ending when it finishes
+        or ``timeout`` seconds pass; yields None after ``heartbeat`` quiet seconds
+        """
+        deadline = time.monotonic() + timeout
+        last = None
+        last_yield = time.monotonic()
+        while time.monotonic() < deadline:
+            job = self.get(job_id)
+            if job is None:
+                return
+            seen = (job['state'], job['updated_at'], job.get('position'))
+            if seen != last:
+                last = seen
+                last_yield = time.monotonic()
+                yield job
+                if job['state'] in TERMINAL_STATES:
+                    return
+            elif time.monotonic() - last_yield >= heartbeat:
+                last_yield = time.monotonic()
+                yield None
+            self._wait_for_change(self.poll_interval)
+
+    def _wait_for_change(self, timeout):
+        # Jobs finishing in this process wake waiters at once; others are seen on the next poll
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            job = self.store.claim(self.owner, time.time())
+            if job is None:
+                self._maybe_purge()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._active.add(job['id'])
+            self._notify()
+            try:
+                result = self.handlers[job['kind']](job['payload'], job['data'])
+            except Exception as e:
+                logger.error(f"Job {job['id']} ({job['kind']}) failed: {str(e)}")
+                self.store.finish(job['id'], 'failed', None, str(e), time.time())
+                self._stats['failed'] += 1
+            else:
+                self.store.finish(job['id'], 'succeeded', result, None, time.time())
+                self._stats['succeeded'] += 1
+            finally:
+                self._active.discard(job['id'])
+            self._notify()
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now - self._purged_at < 60:
+            return
+        self._purged_at = now
+        try:
+            self.store.purge(now - self.retention)
+        except sqlite3.Error as e:
+            logger.error(f"Error purging finished jobs: {str(e)}")
+
+    def close(self):
+        """
+        Stop claiming jobs, wait up to ``drain_timeout`` for running ones and
+        queue again whatever has not finished, for another worker to pick up
+        """
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + self.drain_timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        for job_id in list(self._active):
+            logger.warning(f"Re-queueing job {job_id} still running at shutdown")
+            self.store.requeue(job_id, time.time())
+            self._stats['requeued'] += 1
+        self.store.unregister(self.owner)
+        self._pid = None
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['running_here'] = len(self._active)
+        stats['queued'] = self.store.count('queued')
+        stats['running'] = self.store.count('running')
+        stats['max_queued'] = self.max_queued
+        return stats
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def job_priority(value):
+    """
+    ``value`` (an int, or a string from a form field) as a job priority;
+    raises ValueError unless it is an integer within PRIORITY_RANGE
+    """
+    low, high = PRIORITY_RANGE
+    message = f"priority must be an integer from {low} to {high}"
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(message)
+    try:
+        priority = int(value)
+    except ValueError:
+        raise ValueError(message)
+    if not low <= priority <= high:
+        raise ValueError(message)
+    return priority
+
+
+def public_job(job):
+    """
+    The job fields returned to API clients
+    """
+    fields = ('id', 'kind', 'state', 'priority', 'attempts', 'created_at', 'started_at',
+              'finished_at', 'position', 'result', 'error')
+    return {field: job[field] for field in fields if job.get(field) is not None}
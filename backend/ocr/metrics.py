@@ -0,0 +1,177 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - /metrics reports nothing without prometheus-client
+    prometheus_client = None
+
+# Stages take from a millisecond (text fields) to tens of seconds (Tesseract on a large page)
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class _NullMetric:
+    """
+    Stand-in for a Prometheus metric when prometheus-client is not installed
+    """
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+
+def _metric(kind, name, documentation, labels, **kwargs):
+    if prometheus_client is None:
+        return _NullMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labels, **kwargs)
+
+
+STAGE_SECONDS = _metric(
+    'Histogram', 'ocr_stage_seconds', 'Time spent in each OCR pipeline stage',
+    ['stage'], buckets=STAGE_BUCKETS
+)
+TIMEOUTS = _metric('Counter', 'ocr_timeouts_total', 'Stages that timed out', ['stage'])
+ERRORS = _metric('Counter', 'ocr_errors_total', 'Stages that failed with an error', ['stage'])
+CACHE_LOOKUPS = _metric('Counter', 'ocr_cache_lookups_total', 'OCR cache lookups by result (hit or miss)', ['result'])
+POOL_WAIT_SECONDS = _metric(
+    'Histogram', 'ocr_pool_wait_seconds', 'Time spent waiting to check out a pooled resource',
+    ['pool'], buckets=STAGE_BUCKETS
+)
+POOL_SATURATED = _metric(
+    'Counter', 'ocr_pool_saturated_total', 'Checkouts that found every pooled resource busy', ['pool']
+)
+POOL_IN_USE = _metric(
+    'Gauge', 'ocr_pool_in_use', 'Pooled resources currently checked out', ['pool'],
+    multiprocess_mode='livesum'
+)
+
+# The trace of the request being served
+_trace = contextvars.ContextVar('trace', default=None)
+
+
+class Trace:
+    """
+    Per-request timing breakdown: total seconds, count and slowest call per
+    stage, plus cache lookups by result
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._cache = {}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+
+    def count(self, result):
+        with self._lock:
+            self._cache[result] = self._cache.get(result, 0) + 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'total_seconds': round(time.monotonic() - self.started, 4),
+                'stages': {
+                    stage: {'count': entry['count'], 'seconds': round(entry['seconds'], 4), 'max': round(entry['max'], 4)}
+                    for stage, entry in self._stages.items()
+                },
+                'cache': dict(self._cache),
+            }
+
+
+@contextmanager
+def tracing(enabled=True):
+    """
+    Collect a Trace of every stage run for the current request (None when not ``enabled``)
+    """
+    if not enabled:
+        yield None
+        return
+    trace = Trace()
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def observe(stage, seconds):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    trace = _trace.get()
+    if trace is not None:
+        trace.record(stage, seconds)
+
+
+def _is_timeout(error):
+    # pytesseract reports its subprocess timeout as a RuntimeError
+    return isinstance(error, TimeoutError) or (isinstance(error, RuntimeError) and 'timeout' in str(error).lower())
+
+
+def record_error(stage, error):
+    if _is_timeout(error):
+        TIMEOUTS.labels(stage).inc()
+    else:
+        ERRORS.labels(stage).inc()
+
+
+@contextmanager
+def stage(name):
+    """
+    Time the ``with`` block as stage ``name``; an exception escaping it is
+    counted as a timeout or an error
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_error(name, e)
+        raise
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def cache_lookup(result):
+    CACHE_LOOKUPS.labels(result).inc()
+    trace = _trace.get()
+    if trace is not None:
+        trace.count(result)
+
+
+def pool_checkout(pool, wait_seconds, saturated):
+    POOL_WAIT_SECONDS.labels(pool).observe(wait_seconds)
+    if saturated:
+        POOL_SATURATED.labels(pool).inc()
+    trace = _trace.get()
+    if trace is not None:
+        trace.record(f"{pool}_checkout", wait_seconds)
+
+
+def render():
+    """
+    Return ``(body, content_type)`` for the /metrics endpoint, aggregating
+    every worker process when PROMETHEUS_MULTIPROC_DIR is set
+    """
+    if prometheus_client is None:
+        return b'# prometheus-client is not installed\n', 'text/plain; charset=utf-8'
+    registry = prometheus_client.REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,246 @@
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REGION_MODES = ('off', 'crop', 'blocks')
+THRESHOLD_MODES = ('auto', 'otsu', 'adaptive')
+
+
+class Preprocessor:
+    """
+    Adaptive OCR preprocessing.
+
+    Phone photos are far larger than Tesseract needs and mostly background,
+    so the image is analysed on a small working copy first: the typical
+    character height is estimated from connected components, text lines are
+    found from a morphological gradient, and their orientation gives the
+    skew. Only the text regions are then cut from the full-resolution image,
+    rescaled so characters are about ``target_char_height`` pixels tall,
+    deskewed and binarised with Otsu, or with an adaptive threshold when the
+    background lighting is uneven.
+
+    ``run(image)`` returns the images to recognise, in reading order, and a
+    report of the choices made for the response.
+    """
+
+    def __init__(self, target_char_height=32, max_side=2400, max_upscale=2.0, regions='crop',
+                 deskew=True, max_skew=15.0, threshold='auto', illumination_spread=40,
+                 denoise=True, working_side=1000):
+        if regions not in REGION_MODES:
+            raise ValueError(f"Unknown region mode {regions!r}")
+        if threshold not in THRESHOLD_MODES:
+            raise ValueError(f"Unknown threshold mode {threshold!r}")
+        self.target_char_height = target_char_height
+        self.max_side = max_side
+        self.max_upscale = max_upscale
+        self.regions = regions
+        self.deskew = deskew
+        self.max_skew = max_skew
+        self.threshold = threshold
+        self.illumination_spread = illumination_spread
+        self.denoise = denoise
+        self.working_side = working_side
+
+    def settings(self):
+        return {
+            'target_char_height': self.target_char_height,
+            'max_side': self.max_side,
+            'max_upscale': self.max_upscale,
+            'regions': self.regions,
+            'deskew': self.deskew,
+            'max_skew': self.max_skew,
+            'threshold': self.threshold,
+            'illumination_spread': self.illumination_spread,
+            'denoise': self.denoise,
+        }
+
+    def run(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        height, width = gray.shape
+        report = {'input_size': [width, height]}
+
+        # Analyse a small copy; everything found there is mapped back by ``ratio``
+        ratio = min(self.working_side / max(width, height), 1.0)
+        small = cv2.resize(gray, None, fx=ratio, fy=ratio, interpolation=cv2.INTER_AREA) if ratio < 1 else gray
+
+        char_height = self._char_height(small)
+        report['char_height'] = round(char_height / ratio, 1) if char_height else None
+
+        boxes, skew = self._text_lines(small, char_height)
+        report['skew'] = round(skew, 2)
+
+        if self.regions == 'off' or not boxes:
+            regions = [(0, 0, width, height)]
+        else:
+            boxes = [self._to_full(box, ratio, width, height) for box in boxes]
+            if self.regions == 'crop':
+                regions = [_union(boxes)]
+            else:
+                regions = _merge(boxes)
+        report['region_mode'] = self.regions if boxes else 'off'
+        report['regions'] = [list(region) for region in regions]
+
+        # One scale for every region so characters end up the same height
+        if char_height:
+            scale = self.target_char_height / (char_height / ratio)
+        else:
+            scale = 1.0
+        scale = min(scale, self.max_upscale)
+        largest = max(max(w, h) for _, _, w, h in regions)
+        scale = min(scale, self.max_side / largest)
+        report['scale'] = round(scale, 3)
+
+        outputs = []
+        methods = []
+        spreads = []
+        for x, y, w, h in regions:
+            crop = gray[y:y + h, x:x + w]
+            if abs(scale - 1.0) > 0.05:
+                interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+                crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=interpolation)
+            if self.deskew and 0.5 <= abs(skew) <= self.max_skew:
+                crop = _rotate(crop, skew)
+            binary, method, spread = self._binarize(crop)
+            outputs.append(binary)
+            methods.append(method)
+            spreads.append(spread)
+        report['deskewed'] = self.deskew and 0.5 <= abs(skew) <= self.max_skew
+        report['threshold'] = methods[0] if len(set(methods)) == 1 else methods
+        report['illumination_spread'] = max(spreads)
+        report['output_size'] = [[out.shape[1], out.shape[0]] for out in outputs]
+        return outputs, report
+
+    def _char_height(self, small):
+        """
+        Median height of character-sized connected components, or None
+        """
+        binary = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        height, width = small.shape
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        plausible = (heights >= 4) & (heights < height / 4) & (widths < width / 4) & (areas >= 8)
+        if np.count_nonzero(plausible) < 5:
+            return None
+        return float(np.median(heights[plausible]))
+
+    def _text_lines(self, small, char_height):
+        """
+        Bounding boxes of text lines on the working copy and their median angle
+        """
+        char_height = char_height or max(small.shape) / 60
+        gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+        # Drop edge components much taller than a character, such as label
+        # outlines and box edges, so they cannot swallow the lines they touch
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(edges, connectivity=8)
+        keep = stats[:, cv2.CC_STAT_HEIGHT] <= char_height * 2.5
+        keep[0] = False
+        edges = np.where(keep[labels], np.uint8(255), np.uint8(0))
+
+        # Smear characters into words and lines
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(int(char_height * 1.2), 3), max(int(char_height / 4), 1)))
+        lines = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+        # Two-level hierarchy so lines inside a label's outline are still found
+        contours, hierarchy = cv2.findContours(lines, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+
+        boxes = []
+        angles = []
+        for contour, (_, _, _, parent) in zip(contours, hierarchy[0] if hierarchy is not None else []):
+            if parent != -1:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            (_, _), (rect_w, rect_h), angle = cv2.minAreaRect(contour)
+            if rect_w < rect_h:
+                rect_w, rect_h = rect_h, rect_w
+                angle -= 90
+            if rect_h < char_height * 0.5 or rect_w < char_height or rect_h > small.shape[0] / 3:
+                continue
+            # Outlines and photo edges are sparse within their rotated rectangle; text is dense
+            if cv2.countNonZero(edges[y:y + h, x:x + w]) < 0.1 * rect_w * rect_h:
+                continue
+            boxes.append((x, y, w, h))
+            if rect_w > 3 * rect_h:
+                angles.append(_normalize_angle(angle))
+
+        skew = float(np.median(angles)) if angles else 0.0
+        return boxes, skew
+
+    def _to_full(self, box, ratio, width, height):
+        # Map a working-copy box to full resolution with some padding around it
+        x, y, w, h = (value / ratio for value in box)
+        pad = h / 2
+        left, top = max(int(x - pad), 0), max(int(y - pad), 0)
+        right, bottom = min(int(x + w + pad), width), min(int(y + h + pad), height)
+        return left, top, right - left, bottom - top
+
+    def _binarize(self, gray):
+        """
+        Threshold ``gray`` and return ``(binary, method, illumination_spread)``
+        """
+        # Estimate the background by removing dark text, then compare regions of it
+        background = cv2.dilate(gray, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15)))
+        tiles = cv2.resize(background, (8, 8), interpolation=cv2.INTER_AREA)
+        spread = int(tiles.max()) - int(tiles.min())
+
+        method = self.threshold
+        if method == 'auto':
+            method = 'adaptive' if spread > self.illumination_spread else 'otsu'
+
+        if method == 'adaptive':
+            block = int(self.target_char_height * 2) | 1
+            binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10)
+        else:
+            binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+
+        if self.denoise:
+            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+            cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, dst=binary, iterations=1)
+        return binary, method, spread
+
+
+def _normalize_angle(angle):
+    while angle > 45:
+        angle -= 90
+    while angle <= -45:
+        angle += 90
+    return angle
+
+
+def _rotate(gray, angle):
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def _union(boxes):
+    left = min(x for x, _, _, _ in boxes)
+    top = min(y for _, y, _, _ in boxes)
+    right = max(x + w for x, _, w, _ in boxes)
+    bottom = max(y + h for _, y, _, h in boxes)
+    return left, top, right - left, bottom - top
+
+
+def _merge(boxes):
+    """
+    Merge overlapping boxes and return them in reading order
+    """
+    merged = []
+    for box in sorted(boxes, key=lambda b: (b[1], b[0])):
+        for index, other in enumerate(merged):
+            if _overlaps(box, other):
+                merged[index] = _union([box, other])
+                break
+        else:
+            merged.append(box)
+    if len(merged) < len(boxes):
+        return _merge(merged)
+    return sorted(merged, key=lambda b: (b[1], b[0]))
+
+
+def _overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
@@ -1,10 +1,11 @@
 import os
-import re
 import json
 import time
+import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from urllib.parse import urlparse
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -13,9 +14,19 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import requests
 from dotenv import load_dotenv
+from driver_pool import DriverPool
+from scheduler import SearchTask, run_tasks
+from fetcher import TieredFetcher
+from cache import SearchCache, PartialResults, normalize_query
+from extraction import page_extractor
+from registry import AdapterRegistry
+from resilience import HostGuards, CircuitOpen, RateLimited
+from jobs import JobQueue, QueueFull, UnknownJobKind, public_job
+from loading import LoadingProfile, apply_profile
+from playwright_engine import PlaywrightEngine, RenderTimeout
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -29,9 +40,27 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# What headless Chrome may load by default; site adapters can override it
+# with a "loading" object. Only the page source is read, so images, media,
+# fonts and ad/analytics hosts are blocked unless BROWSER_BLOCK says otherwise.
+default_loading = LoadingProfile(
+    block=[kind.strip() for kind in os.environ.get('BROWSER_BLOCK', 'images,media,fonts,third_party').split(',') if kind.strip()]
+)
+
+# 'eager' returns from driver.get() at DOMContentLoaded instead of waiting
+# for every subresource; render_page then waits for the selector it needs
+PAGE_LOAD_STRATEGY = os.environ.get('DRIVER_PAGE_LOAD_STRATEGY', 'eager')
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Browser engine behind render_page: 'selenium' (a pool of WebDrivers) or
+# 'playwright' (one Chromium with a context per page on an asyncio loop)
+SCRAPER_ENGINE = os.environ.get('SCRAPER_ENGINE', 'selenium')
+
 # Configure Chrome options for Selenium
 def get_chrome_options():
     chrome_options = Options()
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -41,13 +70,27 @@ def get_chrome_options():
     chrome_options.add_argument("--disable-infobars")
     chrome_options.add_argument("--disable-notifications")
     chrome_options.add_argument("--disable-popup-blocking")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-component-update")
+    chrome_options.add_argument("--disable-default-apps")
+    chrome_options.add_argument("--mute-audio")
+    if 'images' in default_loading.block:
+        # Also catches images without a file extension, which URL patterns miss;
+        # this applies to every site, whatever its own loading settings
+        chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
     return chrome_options
 
+# Path of the chromedriver binary, resolved once per process
+_chromedriver_path = None
+
 # Initialize WebDriver
 def init_driver():
+    global _chromedriver_path
     try:
-        service = Service(ChromeDriverManager().install())
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+        service = Service(_chromedriver_path)
         driver = webdriver.Chrome(service=service, options=get_chrome_options())
         return driver
     except Exception as e:
@@ -61,294 +104,491 @@ def init_driver():
             logger.error(f"Fallback WebDriver initialization failed: {str(e2)}")
             raise
 
+# Site adapters (URLs, selectors, patterns, limits), reloaded when the files change
+adapter_registry = AdapterRegistry(
+    os.environ.get('SITES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sites')),
+    check_interval=float(os.environ.get('SITES_CHECK_INTERVAL', 2)),
+    default_loading=default_loading,
+    # Chrome's URL blocking under Selenium cannot let single URLs through
+    exact_allow=SCRAPER_ENGINE == 'playwright'
+)
+
+# Pool of warm WebDrivers shared by all requests in this process
+driver_pool = DriverPool(
+    init_driver,
+    size=int(os.environ.get('DRIVER_POOL_SIZE', 3)),
+    max_pages=int(os.environ.get('DRIVER_MAX_PAGES', 50)),
+    max_age=int(os.environ.get('DRIVER_MAX_AGE', 1800)),
+    checkout_timeout=int(os.environ.get('DRIVER_CHECKOUT_TIMEOUT', 60))
+)
+
+# Readiness check used instead of a fixed sleep after navigation
+def document_ready(driver):
+    return driver.execute_script('return document.readyState') in ('interactive', 'complete')
+
+# Loading profile for a URL: its site adapter's, or the default for other sites
+def loading_profile_for(url):
+    adapter = adapter_registry.for_url(url)
+    return adapter.loading if adapter is not None else default_loading
+
+# Load a page in a pooled browser
+def render_page(url, ready_selector=None, timeout=15):
+    """
+    Navigate a pooled driver to ``url`` and return the rendered HTML
+    
+    Waits for ``ready_selector`` when given (raising TimeoutException if it
+    never appears), otherwise for document readiness.
+    """
+    timeout = max(timeout, 1)
+    
+    with driver_pool.checkout() as driver:
+        try:
+            driver.set_page_load_timeout(timeout)
+            apply_profile(driver, loading_profile_for(url))
+            with metrics.stage('navigation'):
+                driver.get(url)
+            driver_pool.record_page(driver)
+            
+            # Wait for the page to be usable rather than sleeping a fixed time
+            if ready_selector:
+                with metrics.stage('selector_wait'):
+                    WebDriverWait(driver, timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, ready_selector))
+                    )
+            else:
+                try:
+                    with metrics.stage('selector_wait'):
+                        WebDriverWait(driver, timeout).until(document_ready)
+                except TimeoutException:
+                    logger.warning(f"Timeout waiting for {url} to become ready, using partial page")
+            
+            return driver.page_source
+        except Exception as e:
+            driver_pool.report_error(driver, e)
+            raise
+
+# Playwright engine, used instead of the driver pool when SCRAPER_ENGINE=playwright
+playwright_engine = None
+if SCRAPER_ENGINE == 'playwright':
+    playwright_engine = PlaywrightEngine(
+        loading_profile_for,
+        max_pages=int(os.environ.get('PLAYWRIGHT_MAX_PAGES', 8)),
+        user_agent=USER_AGENT,
+        launch_args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu', '--disable-background-networking', '--mute-audio'],
+        network_idle_timeout=float(os.environ.get('PLAYWRIGHT_NETWORK_IDLE_TIMEOUT', 5))
+    )
+elif SCRAPER_ENGINE != 'selenium':
+    raise ValueError(f"Unknown SCRAPER_ENGINE {SCRAPER_ENGINE!r}; use 'selenium' or 'playwright'")
+
+# Start browsers before the first request needs one
+def warm_browser():
+    if playwright_engine is not None:
+        playwright_engine.start()
+    else:
+        driver_pool.warm()
+
+# Per-host rate limits, retry budgets and circuit breakers for outbound fetches
+host_guards = HostGuards(
+    rate=float(os.environ.get('HOST_RATE_LIMIT', 2)),
+    burst=int(os.environ.get('HOST_RATE_BURST', 5)),
+    max_wait=float(os.environ.get('HOST_RATE_MAX_WAIT', 5)),
+    failure_threshold=int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 5)),
+    cooldown=float(os.environ.get('BREAKER_COOLDOWN', 60)),
+    max_attempts=int(os.environ.get('FETCH_MAX_ATTEMPTS', 2))
+)
+
+# Plain-HTTP fetcher that escalates to the browser when needed
+fetcher = TieredFetcher(
+    playwright_engine.render_page if playwright_engine is not None else render_page,
+    limit_per_host=int(os.environ.get('HTTP_LIMIT_PER_HOST', 4)),
+    timeout=float(os.environ.get('HTTP_TIMEOUT', 10)),
+    guards=host_guards,
+    # A selector that never appeared will not appear on a second try either
+    retryable=lambda error: not isinstance(error, (TimeoutException, RenderTimeout))
+)
+
+# Visit a single search hit and extract data from it
+def visit_result_page(link, query, timeout, extractor=None):
+    """
+    Fetch a result page (HTTP first, browser if needed) and extract structured data from it
+    """
+    page = fetcher.fetch(link, timeout=timeout)
+    return extract_data_from_page(page.html, query, extractor)
+
+# Shared executor for source and website tasks
+task_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('SEARCH_TASK_WORKERS', 8)),
+    thread_name_prefix='search-task'
+)
+
+# Whole queries from /search/batch run here; keep it small enough that their
+# site tasks do not queue behind each other on task_executor
+BATCH_QUERY_CONCURRENCY = int(os.environ.get('BATCH_QUERY_CONCURRENCY', 2))
+BATCH_MAX_QUERIES = int(os.environ.get('BATCH_MAX_QUERIES', 500))
+batch_executor = ThreadPoolExecutor(
+    max_workers=BATCH_QUERY_CONCURRENCY,
+    thread_name_prefix='search-batch'
+)
+
+# Cached search results, per source, in front of the scrapers
+search_cache = SearchCache(
+    task_executor,
+    ttls={'general': int(os.environ.get('CACHE_TTL_GENERAL', 21600))},
+    default_ttl=int(os.environ.get('CACHE_TTL_SPECIALIZED', 3600)),
+    stale_ttl=int(os.environ.get('CACHE_STALE_TTL', 86400)),
+    max_entries=int(os.environ.get('SEARCH_CACHE_SIZE', 1000)),
+    path=os.environ.get('SEARCH_CACHE_PATH')
+)
+
 # General search function
-def search_general(query):
+def search_general(query, concurrency=None, deadline=None):
     """
     Search for item details using general search engines
+    
+    The top hits are visited in parallel (at most ``concurrency`` at once,
+    defaulting to the search engine adapter's limit). Whatever has finished
+    when ``deadline`` seconds have passed is returned, as PartialResults if
+    any visit was dropped so the cache does not keep the shortened list.
+    RateLimited and CircuitOpen for the search engine itself are raised, so
+    callers can tell a throttled search from one that found nothing.
     """
     results = []
-    
-    # Google search URL
-    search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+    started = time.monotonic()
     
     try:
-        driver = init_driver()
-        driver.get(search_url)
+        engine = adapter_registry.search_engine()
+        concurrency = concurrency or engine.concurrency
+        deadline = deadline or engine.deadline
+        hits = []
         
-        # Wait for search results to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.g"))
+        page = fetcher.fetch(
+            engine.url_for(query),
+            render_js=engine.render_js,
+            required_selector=engine.selector_strings['item'],
+            timeout=10
         )
         
         # Get search results
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        search_results = soup.select("div.g")
+        search_results = engine.select('item', page.soup)
         
-        for result in search_results[:5]:  # Get top 5 results
-            try:
-                link_element = result.select_one("a")
-                if not link_element:
+        for result in search_results[:engine.max_results]:
+            link_element = engine.select_one('link', result)
+            if not link_element:
+                continue
+            
+            link = link_element.get('href')
+            if not link or not link.startswith('http'):
+                continue
+            
+            title_element = engine.select_one('title', result)
+            title = title_element.text if title_element else "No title"
+            
+            snippet_element = engine.select_one('snippet', result)
+            snippet = snippet_element.text if snippet_element else "No description"
+            
+            hits.append({'link': link, 'title': title, 'snippet': snippet})
+        
+        if not hits:
+            return results
+        
+        # Visit the pages concurrently to extract more details
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='visit')
+        try:
+            remaining = deadline - (time.monotonic() - started)
+            futures = [
+                executor.submit(metrics.bind(visit_result_page), hit['link'], query, remaining, engine.page_extractor)
+                for hit in hits
+            ]
+            done, not_done = wait(futures, timeout=max(remaining, 0))
+            
+            if not_done:
+                logger.warning(f"General search deadline reached, dropping {len(not_done)} unfinished page visits")
+                results = PartialResults()
+            
+            # Keep the search engine's ranking order for the pages that finished
+            for hit, future in zip(hits, futures):
+                if future not in done:
                     continue
-                
-                link = link_element.get('href')
-                if not link or not link.startswith('http'):
+                try:
+                    data = future.result()
+                except (CircuitOpen, RateLimited) as e:
+                    logger.warning(f"Skipping search result {hit['link']}: {str(e)}")
+                    results = PartialResults(results)
+                    continue
+                except Exception as e:
+                    logger.error(f"Error processing search result: {str(e)}")
                     continue
-                
-                title_element = result.select_one("h3")
-                title = title_element.text if title_element else "No title"
-                
-                snippet_element = result.select_one("div.VwiC3b")
-                snippet = snippet_element.text if snippet_element else "No description"
-                
-                # Visit the page to extract more details
-                driver.get(link)
-                time.sleep(3)  # Wait for page to load
-                
-                page_soup = BeautifulSoup(driver.page_source, 'html.parser')
-                
-                # Extract potential data
-                data = extract_data_from_page(page_soup, query)
                 
                 results.append({
                     'source': 'general',
-                    'source_url': link,
-                    'title': title,
-                    'description': snippet,
+                    'source_url': hit['link'],
+                    'title': hit['title'],
+                    'description': hit['snippet'],
                     'data': data
                 })
-            except Exception as e:
-                logger.error(f"Error processing search result: {str(e)}")
-                continue
+        finally:
+            # Unfinished visits keep running in the background and return their drivers when done
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    except (CircuitOpen, RateLimited):
+        raise
     
     except Exception as e:
         logger.error(f"Error in general search: {str(e)}")
     
-    finally:
-        if 'driver' in locals():
-            driver.quit()
-    
     return results
 
-# Specialized search function for auto parts
-def search_auto_parts(query):
+# Extract data from a single listing on a specialized website
+def parse_auto_parts_item(item, adapter, url):
     """
-    Search for auto parts details using specialized websites
+    Build a search result from one listing element of a specialized website
+    """
+    title_element = adapter.select_one('title', item)
+    title = title_element.text.strip() if title_element else "No title"
+    
+    price_element = adapter.select_one('price', item)
+    price = price_element.text.strip() if price_element else None
+    
+    part_number_element = adapter.select_one('part_number', item)
+    part_number = None
+    if part_number_element:
+        # Extract part number using the adapter's pattern
+        part_number_match = adapter.search('part_number', part_number_element.text)
+        if part_number_match:
+            part_number = part_number_match.group(1)
+    
+    # Extract other data from the item
+    data = {
+        'title': title,
+        'price': price,
+        'part_number': part_number,
+        'source_name': adapter.name
+    }
+    
+    # Try to extract more details
+    vehicle_make_match = adapter.search('vehicle_make', title)
+    if vehicle_make_match:
+        data['vehicle_make'] = vehicle_make_match.group(1)
+    
+    vehicle_model_match = adapter.search('vehicle_model', title)
+    if vehicle_model_match:
+        data['vehicle_model'] = vehicle_model_match.group(1)
+    
+    # Extract dimensions if available
+    dimensions_element = adapter.select_one('dimensions', item)
+    if dimensions_element:
+        dimensions_text = dimensions_element.text
+        for field in ('width', 'height', 'depth'):
+            match = adapter.search(field, dimensions_text)
+            if match:
+                data[field] = float(match.group(1))
+    
+    # Extract weight if available
+    weight_element = adapter.select_one('weight', item)
+    if weight_element:
+        weight_match = adapter.search('weight', weight_element.text)
+        if weight_match:
+            data['weight'] = float(weight_match.group(1))
+            data['weight_unit'] = weight_match.group(2)
+    
+    return {
+        'source': 'specialized',
+        'source_url': url,
+        'title': title,
+        'description': f"Part from {adapter.name}",
+        'data': data
+    }
+
+# Scrape a single specialized website
+def scrape_website(adapter, query):
+    """
+    Search one specialized website, over HTTP when its listings are server-rendered
+    
+    RateLimited and CircuitOpen are raised for the caller to report.
     """
     results = []
+    url = adapter.url_for(query)
     
-    # List of specialized auto parts websites
-    websites = [
-        {
-            'name': 'RockAuto',
-            'url': f"https://www.rockauto.com/en/search/?query={query.replace(' ', '+')}",
-            'item_selector': 'tbody.listing-inner',
-            'title_selector': 'span.ra-description',
-            'price_selector': 'span.ra-formatted-amount',
-            'part_number_selector': 'span.ra-part-number'
-        },
-        {
-            'name': 'AutoZone',
-            'url': f"https://www.autozone.com/search?searchText={query.replace(' ', '+')}",
-            'item_selector': 'div.product-card',
-            'title_selector': 'h2.product-name',
-            'price_selector': 'span.price',
-            'part_number_selector': 'div.product-details'
-        }
-    ]
+    # Respect the adapter's concurrency limit for this site
+    with adapter.semaphore:
+        try:
+            page = fetcher.fetch(
+                url,
+                render_js=adapter.render_js,
+                required_selector=adapter.selector_strings['item'],
+                timeout=15
+            )
+        except (TimeoutException, RenderTimeout):
+            logger.warning(f"Timeout waiting for results on {adapter.name}")
+            return results
     
-    try:
-        driver = init_driver()
-        
-        for website in websites:
+    items = adapter.select('item', page.soup)
+    
+    with metrics.stage('extract'):
+        for item in items[:adapter.max_results]:
             try:
-                driver.get(website['url'])
-                
-                # Wait for search results to load
-                try:
-                    WebDriverWait(driver, 15).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, website['item_selector']))
-                    )
-                except TimeoutException:
-                    logger.warning(f"Timeout waiting for results on {website['name']}")
-                    continue
-                
-                # Get search results
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                items = soup.select(website['item_selector'])
-                
-                for item in items[:3]:  # Get top 3 results from each site
-                    try:
-                        title_element = item.select_one(website['title_selector'])
-                        title = title_element.text.strip() if title_element else "No title"
-                        
-                        price_element = item.select_one(website['price_selector'])
-                        price = price_element.text.strip() if price_element else None
-                        
-                        part_number_element = item.select_one(website['part_number_selector'])
-                        part_number = None
-                        if part_number_element:
-                            # Extract part number using regex
-                            part_number_text = part_number_element.text
-                            part_number_match = re.search(r'Part #:\s*([A-Z0-9-]+)', part_number_text)
-                            if part_number_match:
-                                part_number = part_number_match.group(1)
-                        
-                        # Extract other data from the item
-                        data = {
-                            'title': title,
-                            'price': price,
-                            'part_number': part_number,
-                            'source_name': website['name']
-                        }
-                        
-                        # Try to extract more details
-                        vehicle_make_match = re.search(r'for\s+([A-Za-z]+)', title)
-                        if vehicle_make_match:
-                            data['vehicle_make'] = vehicle_make_match.group(1)
-                        
-                        vehicle_model_match = re.search(r'for\s+[A-Za-z]+\s+([A-Za-z0-9]+)', title)
-                        if vehicle_model_match:
-                            data['vehicle_model'] = vehicle_model_match.group(1)
-                        
-                        # Extract dimensions if available
-                        dimensions_element = item.select_one('div.dimensions, div.specs')
-                        if dimensions_element:
-                            dimensions_text = dimensions_element.text
-                            width_match = re.search(r'Width:\s*([\d.]+)\s*in', dimensions_text)
-                            height_match = re.search(r'Height:\s*([\d.]+)\s*in', dimensions_text)
-                            depth_match = re.search(r'Depth:\s*([\d.]+)\s*in', dimensions_text)
-                            
-                            if width_match:
-                                data['width'] = float(width_match.group(1))
-                            if height_match:
-                                data['height'] = float(height_match.group(1))
-                            if depth_match:
-                                data['depth'] = float(depth_match.group(1))
-                        
-                        # Extract weight if available
-                        weight_element = item.select_one('div.weight, div.specs')
-                        if weight_element:
-                            weight_text = weight_element.text
-                            weight_match = re.search(r'Weight:\s*([\d.]+)\s*(lb|kg)', weight_text)
-                            if weight_match:
-                                data['weight'] = float(weight_match.group(1))
-                                data['weight_unit'] = weight_match.group(2)
-                        
-                        results.append({
-                            'source': 'specialized',
-                            'source_url': website['url'],
-                            'title': title,
-                            'description': f"Part from {website['name']}",
-                            'data': data
-                        })
-                    except Exception as e:
-                        logger.error(f"Error processing item from {website['name']}: {str(e)}")
-                        continue
-            
+                results.append(parse_auto_parts_item(item, adapter, url))
             except Exception as e:
-                logger.error(f"Error searching {website['name']}: {str(e)}")
+                logger.error(f"Error processing item from {adapter.name}: {str(e)}")
+                metrics.record_error('extract', e)
                 continue
     
-    except Exception as e:
-        logger.error(f"Error in specialized search: {str(e)}")
+    return results
+
+# Validate the client's overrides of the general search's concurrency and deadline
+def search_overrides(data):
+    """
+    Return ``(concurrency, deadline)`` from a request body, None for each one not given
     
-    finally:
-        if 'driver' in locals():
-            driver.quit()
+    Raises ValueError unless each is a positive number. Values above the
+    search engine adapter's ``concurrency`` and ``timeout`` are clamped to them.
+    """
+    concurrency = data.get('concurrency')
+    deadline = data.get('deadline')
     
-    return results
+    if concurrency is not None:
+        if isinstance(concurrency, bool) or not isinstance(concurrency, (int, float, str)):
+            raise ValueError('concurrency must be a positive integer')
+        try:
+            concurrency = int(concurrency)
+        except ValueError:
+            raise ValueError('concurrency must be a positive integer')
+        if concurrency < 1:
+            raise ValueError('concurrency must be a positive integer')
+        concurrency = min(concurrency, adapter_registry.search_engine().concurrency)
+    
+    if deadline is not None:
+        if isinstance(deadline, bool) or not isinstance(deadline, (int, float, str)):
+            raise ValueError('deadline must be a positive number of seconds')
+        try:
+            deadline = float(deadline)
+        except ValueError:
+            raise ValueError('deadline must be a positive number of seconds')
+        if not 0 < deadline < float('inf'):
+            raise ValueError('deadline must be a positive number of seconds')
+        deadline = min(deadline, adapter_registry.search_engine().timeout)
+    
+    return concurrency, deadline
 
-# Extract data from a webpage
-def extract_data_from_page(soup, query):
+# Build the independent scraping tasks for a search request
+def build_search_tasks(query, sources, concurrency=None, deadline=None, use_cache=True):
     """
-    Extract structured data from a webpage
+    One task for the general search and one per specialized website
+    
+    With ``use_cache`` each task is answered from the result cache when
+    possible. The general search bypasses the cache when the request
+    overrides its ``concurrency`` or ``deadline``, since the cached results
+    were computed under the adapter's own.
     """
-    data = {}
+    tasks = []
     
-    # Try to extract part number
-    part_number_patterns = [
-        r'Part\s*#?\s*:\s*([A-Z0-9-]+)',
-        r'Part\s*Number\s*:\s*([A-Z0-9-]+)',
-        r'Item\s*#?\s*:\s*([A-Z0-9-]+)',
-        r'SKU\s*:\s*([A-Z0-9-]+)'
-    ]
+    def task_func(source, func, *args, use_cache=use_cache, **kwargs):
+        if use_cache:
+            return search_cache.cached(source, query, func, *args, **kwargs)
+        return lambda: func(*args, **kwargs)
     
-    for pattern in part_number_patterns:
-        part_number_match = re.search(pattern, soup.text)
-        if part_number_match:
-            data['part_number'] = part_number_match.group(1)
-            break
-    
-    # Try to extract vehicle make and model
-    vehicle_info = re.search(r'for\s+([A-Za-z]+)\s+([A-Za-z0-9]+)', soup.text)
-    if vehicle_info:
-        data['vehicle_make'] = vehicle_info.group(1)
-        data['vehicle_model'] = vehicle_info.group(2)
-    
-    # Try to extract dimensions
-    dimensions_pattern = r'Dimensions\s*:\s*([\d.]+)\s*x\s*([\d.]+)\s*x\s*([\d.]+)\s*(?:in|inches|cm)'
-    dimensions_match = re.search(dimensions_pattern, soup.text)
-    if dimensions_match:
-        data['width'] = float(dimensions_match.group(1))
-        data['height'] = float(dimensions_match.group(2))
-        data['depth'] = float(dimensions_match.group(3))
-    else:
-        # Try individual dimension patterns
-        width_match = re.search(r'Width\s*:\s*([\d.]+)\s*(?:in|inches|cm)', soup.text)
-        height_match = re.search(r'Height\s*:\s*([\d.]+)\s*(?:in|inches|cm)', soup.text)
-        depth_match = re.search(r'Depth\s*:\s*([\d.]+)\s*(?:in|inches|cm)', soup.text)
-        
-        if width_match:
-            data['width'] = float(width_match.group(1))
-        if height_match:
-            data['height'] = float(height_match.group(1))
-        if depth_match:
-            data['depth'] = float(depth_match.group(1))
-    
-    # Try to extract weight
-    weight_pattern = r'Weight\s*:\s*([\d.]+)\s*(lb|lbs|kg|g)'
-    weight_match = re.search(weight_pattern, soup.text)
-    if weight_match:
-        data['weight'] = float(weight_match.group(1))
-        data['weight_unit'] = weight_match.group(2)
-    
-    # Try to extract price
-    price_pattern = r'\$\s*([\d,]+\.?\d*)'
-    price_match = re.search(price_pattern, soup.text)
-    if price_match:
-        data['price'] = float(price_match.group(1).replace(',', ''))
-    
-    # Try to extract color
-    color_pattern = r'Color\s*:\s*([A-Za-z]+)'
-    color_match = re.search(color_pattern, soup.text)
-    if color_match:
-        data['color'] = color_match.group(1)
-    
-    # Try to extract description
-    description_elements = soup.select('div.description, div.product-description, meta[name="description"]')
-    if description_elements:
-        for element in description_elements:
-            if element.name == 'meta':
-                data['description'] = element.get('content', '')
-            else:
-                data['description'] = element.text.strip()
-            break
+    # Apply per-site rate limits from the adapter files
+    for adapter in adapter_registry.by_kind('search_engine') + adapter_registry.by_kind('listing'):
+        if adapter.rate_limit:
+            host_guards.configure(adapter.host, **adapter.rate_limit)
+    
+    if 'general' in sources:
+        engine = adapter_registry.search_engine()
+        general_deadline = deadline or engine.deadline
+        tasks.append(SearchTask(
+            'general',
+            task_func(
+                'general', search_general, query, concurrency=concurrency, deadline=general_deadline,
+                use_cache=use_cache and concurrency is None and deadline is None
+            ),
+            # Leave room for the results page itself on top of the page visits
+            timeout=max(engine.timeout, general_deadline + 15)
+        ))
     
-    # Try to extract image URL
-    image_elements = soup.select('img.product-image, img.main-image')
-    if image_elements:
-        for img in image_elements:
-            src = img.get('src', '')
-            if src and (src.startswith('http') or src.startswith('/')):
-                data['image_url'] = src
-                break
+    if 'specialized' in sources:
+        for adapter in adapter_registry.by_kind('listing'):
+            tasks.append(SearchTask(
+                adapter.name,
+                task_func(adapter.name, scrape_website, adapter, query),
+                timeout=adapter.timeout
+            ))
     
-    return data
+    return tasks
+
+# Name the errors a client can retry later, None for others
+def retryable_error(error):
+    if isinstance(error, RateLimited):
+        return 'rate_limited'
+    if isinstance(error, CircuitOpen):
+        return 'circuit_open'
+    return None
+
+# Merge task outcomes into one result list in task order
+def merge_outcomes(tasks, outcomes):
+    by_name = {outcome.task.name: outcome for outcome in outcomes}
+    results = []
+    for task in tasks:
+        outcome = by_name.get(task.name)
+        if outcome is not None:
+            results.extend(outcome.results)
+    return results
+
+# Specialized search function for auto parts
+def search_auto_parts(query):
+    """
+    Search for auto parts details using specialized websites
+    
+    Each website is scraped as an independent task with its own timeout.
+    """
+    tasks = build_search_tasks(query, ['specialized'])
+    
+    try:
+        return merge_outcomes(tasks, run_tasks(task_executor, tasks))
+    except Exception as e:
+        logger.error(f"Error in specialized search: {str(e)}")
+        return []
+
+# Extract data from a webpage
+def extract_data_from_page(html, query, extractor=None):
+    """
+    Extract structured data from a webpage
+    """
+    with metrics.stage('extract'):
+        return (extractor or page_extractor).extract(html, query)
+
+# Run a search submitted through /jobs
+def run_search_job(payload, data=None):
+    tasks = build_search_tasks(
+        payload['query'],
+        payload.get('sources', ['general', 'specialized']),
+        concurrency=payload.get('concurrency'),
+        deadline=payload.get('deadline'),
+        use_cache=payload.get('cache', True)
+    )
+    return {'results': merge_outcomes(tasks, run_tasks(task_executor, tasks))}
+
+# Persistent queue for long searches; runner threads start in each server worker
+JOBS_MAX_WAIT = float(os.environ.get('JOBS_MAX_WAIT', 60))
+job_queue = JobQueue(
+    # Outside the source tree, which docker-compose bind-mounts into the container
+    os.environ.get('JOBS_DB_PATH', os.path.join(tempfile.gettempdir(), 'scraper-jobs.db')),
+    {'search': run_search_job},
+    workers=int(os.environ.get('JOBS_WORKERS', 4)),
+    max_queued=int(os.environ.get('JOBS_MAX_QUEUED', 200)),
+    retention=int(os.environ.get('JOBS_RETENTION', 86400)),
+    drain_timeout=float(os.environ.get('JOBS_DRAIN_TIMEOUT', 30))
+)
 
 @app.route('/search', methods=['POST'])
 def search():
     """
     Search for item details using web scraping
+    
+    Every source and specialized website runs as an independent task. With
+    ``"stream": true`` the response is NDJSON, one line per task as it
+    finishes, followed by a final ``{"done": true}`` line. With
+    ``"timings": true`` the response (or the final line) also carries a
+    per-stage timing breakdown of this request.
     """
     try:
         data = request.get_json()
@@ -359,29 +599,267 @@ def search():
         query = data['query']
         sources = data.get('sources', ['general', 'specialized'])
         
-        results = []
+        try:
+            concurrency, deadline = search_overrides(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if 'general' in sources:
-            general_results = search_general(query)
-            results.extend(general_results)
+        tasks = build_search_tasks(
+            query,
+            sources,
+            concurrency=concurrency,
+            deadline=deadline,
+            use_cache=data.get('cache', True)
+        )
         
-        if 'specialized' in sources:
-            specialized_results = search_auto_parts(query)
-            results.extend(specialized_results)
+        timings = bool(data.get('timings'))
         
-        return jsonify({'results': results})
+        if data.get('stream'):
+            def generate():
+                with metrics.tracing(timings) as trace:
+                    for outcome in run_tasks(task_executor, tasks):
+                        yield json.dumps(outcome.to_dict()) + '\n'
+                    done = {'done': True}
+                    if trace is not None:
+                        done['timings'] = trace.to_dict()
+                yield json.dumps(done) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        with metrics.tracing(timings) as trace:
+            results = merge_outcomes(tasks, run_tasks(task_executor, tasks))
+        
+        response = {'results': results}
+        if trace is not None:
+            response['timings'] = trace.to_dict()
+        return jsonify(response)
     
     except Exception as e:
         logger.error(f"Error in search endpoint: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    """
+    Search for many queries in one request
+    
+    Queries are deduplicated after normalization and at most
+    BATCH_QUERY_CONCURRENCY of them run at once, sharing the driver pool,
+    HTTP session and cache (which coalesces identical in-flight searches).
+    Unless ``"stream": false`` is given, the response is NDJSON with one
+    line per unique query as it completes, listing the input positions it
+    answers, followed by a final ``{"done": true}`` line. A query that lost
+    sources to a host's rate limit or open circuit breaker carries ``error``
+    (``rate_limited`` or ``circuit_open``) and ``errors`` by source, so the
+    client can retry it later.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('queries'), list) or not data['queries']:
+            return jsonify({'error': 'A non-empty list of queries is required'}), 400
+        
+        queries = data['queries']
+        if len(queries) > BATCH_MAX_QUERIES:
+            return jsonify({'error': f"At most {BATCH_MAX_QUERIES} queries per batch"}), 400
+        if not all(isinstance(query, str) and query.strip() for query in queries):
+            return jsonify({'error': 'Queries must be non-empty strings'}), 400
+        
+        sources = data.get('sources', ['general', 'specialized'])
+        use_cache = data.get('cache', True)
+        
+        # Map each normalized query to the input positions it answers
+        positions = {}
+        for index, query in enumerate(queries):
+            positions.setdefault(normalize_query(query), []).append(index)
+        
+        def run_search(query):
+            tasks = build_search_tasks(query, sources, use_cache=use_cache)
+            outcomes = list(run_tasks(task_executor, tasks))
+            errors = {
+                outcome.task.name: retryable_error(outcome.error)
+                for outcome in outcomes if retryable_error(outcome.error)
+            }
+            return merge_outcomes(tasks, outcomes), errors
+        
+        futures = {
+            batch_executor.submit(run_search, queries[indices[0]]): normalized
+            for normalized, indices in positions.items()
+        }
+        
+        def completed():
+            for future in as_completed(futures):
+                normalized = futures[future]
+                indices = positions[normalized]
+                outcome = {'query': queries[indices[0]], 'indices': indices}
+                try:
+                    outcome['results'], errors = future.result()
+                    if errors:
+                        outcome['error'] = 'rate_limited' if 'rate_limited' in errors.values() else 'circuit_open'
+                        outcome['errors'] = errors
+                except Exception as e:
+                    logger.error(f"Error in batch search for {normalized!r}: {str(e)}")
+                    outcome['results'] = []
+                    outcome['error'] = str(e)
+                yield outcome
+        
+        if data.get('stream', True):
+            def generate():
+                for outcome in completed():
+                    yield json.dumps(outcome) + '\n'
+                yield json.dumps({'done': True}) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        # Return results in input order, duplicates sharing their answer
+        ordered = [None] * len(queries)
+        for outcome in completed():
+            for index in outcome['indices']:
+                entry = {'query': queries[index], 'results': outcome['results']}
+                for key in ('error', 'errors'):
+                    if key in outcome:
+                        entry[key] = outcome[key]
+                ordered[index] = entry
+        
+        return jsonify({'results': ordered})
+    
+    except Exception as e:
+        logger.error(f"Error in batch search endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a search and return its id at once
+    
+    Accepts the same fields as /search plus ``priority`` (an integer from
+    -100 to 100, higher runs sooner). Responds 202 with the job, or 429 when
+    too many jobs are queued.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'query' not in data:
+        return jsonify({'error': 'Query is required'}), 400
+    
+    payload = {key: data[key] for key in ('query', 'sources', 'cache') if key in data}
+    
+    try:
+        concurrency, deadline = search_overrides(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if concurrency is not None:
+        payload['concurrency'] = concurrency
+    if deadline is not None:
+        payload['deadline'] = deadline
+    
+    try:
+        job = job_queue.submit(data.get('kind', 'search'), payload, priority=data.get('priority', 0))
+    except (UnknownJobKind, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '30'}
+    
+    return jsonify(public_job(job)), 202, {'Location': f"/jobs/{job['id']}"}
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Job state and, once finished, its result
+    
+    With ``?wait=N`` the request is held for up to N seconds (capped at
+    JOBS_MAX_WAIT) until the job finishes.
+    """
+    try:
+        wait = min(float(request.args.get('wait', 0)), JOBS_MAX_WAIT)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(public_job(job))
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Server-sent events with the job each time its state changes
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        for job in job_queue.watch(job_id, timeout=JOBS_MAX_WAIT * 10):
+            if job is None:
+                yield ': keepalive\n\n'
+                continue
+            yield f"event: {job['state']}\ndata: {json.dumps(public_job(job))}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a job that has not started yet
+    """
+    if job_queue.cancel(job_id):
+        return jsonify(public_job(job_queue.get(job_id)))
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'error': f"Job is {job['state']} and can no longer be cancelled"}), 409
+
+@app.route('/hosts', methods=['GET'])
+def hosts():
+    """
+    Rate limiter, retry budget and circuit breaker state per scraped host
+    """
+    return jsonify({'hosts': host_guards.snapshot()})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Stage latency histograms and timeout, error, cache and pool counters in Prometheus format
+    """
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """
     Health check endpoint
     """
-    return jsonify({'status': 'healthy', 'service': 'scraper'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'scraper',
+        'driver_pool': driver_pool.stats(),
+        'browser': {
+            'engine': SCRAPER_ENGINE,
+            'page_load_strategy': PAGE_LOAD_STRATEGY,
+            'loading': default_loading.to_dict(),
+            'playwright': playwright_engine.stats() if playwright_engine is not None else None
+        },
+        'fetcher': fetcher.stats(),
+        'cache': search_cache.stats(),
+        'sites': adapter_registry.stats(),
+        'jobs': job_queue.stats()
+    })
+
+def shutdown():
+    """
+    Release browsers, HTTP sessions and worker threads before the process exits
+    """
+    job_queue.close()
+    batch_executor.shutdown(wait=False, cancel_futures=True)
+    task_executor.shutdown(wait=False, cancel_futures=True)
+    fetcher.close()
+    driver_pool.close()
+    if playwright_engine is not None:
+        playwright_engine.close()
 
 if __name__ == '__main__':
+    if os.environ.get('DRIVER_POOL_WARM', 'False').lower() == 'true':
+        warm_browser()
+    job_queue.start()
     port = int(os.environ.get('PORT', 5002))
     app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true')
@@ -0,0 +1,162 @@
+"""
+Micro-benchmark: single-pass PageExtractor vs the original BeautifulSoup
+extract_data_from_page, on the saved HTML fixtures.
+
+Run from backend/scraper:
+
+    python benchmarks/bench_extraction.py [--iterations 200] [--pad 0]
+
+``--pad N`` appends N copies of filler markup to each fixture to mimic
+large real-world pages.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import page_extractor  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+FILLER = (
+    '<div class="related"><a href="/p/{0}">Related product {0}</a>'
+    '<p>Customers who viewed this item also viewed similar parts and accessories.</p></div>\n'
+)
+
+
+def legacy_extract_data_from_page(soup, query):
+    """
+    The extractor as it was before PageExtractor, kept for comparison
+    """
+    data = {}
+    
+    # Try to extract part number
+    part_number_patterns = [
+        r'Part\s*#?\s*:\s*([A-Z0-9-]+)',
+        r'Part\s*Number\s*:\s*([A-Z0-9-]+)',
+        r'Item\s*#?\s*:\s*([A-Z0-9-]+)',
+        r'SKU\s*:\s*([A-Z0-9-]+)'
+    ]
+    
+    for pattern in part_number_patterns:
+        part_number_match = re.search(pattern, soup.text)
+        if part_number_match:
+            data['part_number'] = part_number_match.group(1)
+            break
+    
+    # Try to extract vehicle make and model
+    vehicle_info = re.search(r'for\s+([A-Za-z]+)\s+([A-Za-z0-9]+)', soup.text)
+    if vehicle_info:
+        data['vehicle_make'] = vehicle_info.group(1)
+        data['vehicle_model'] = vehicle_info.group(2)
+    
+    # Try to extract dimensions
+    dimensions_pattern = r'Dimensions\s*:\s*([\d.]+)\s*x\s*([\d.]+)\s*x\s*([\d.]+)\s*(?:in|inches|cm)'
+    dimensions_match = re.search(dimensions_pattern, soup.text)
+    if dimensions_match:
+        data['width'] = float(dimensions_match.group(1))
+        data['height'] = float(dimensions_match.group(2))
+        data['depth'] = float(dimensions_match.group(3))
+    else:
+        # Try individual dimension patterns
+        width_match = re.search(r'Width\s*:\s*([\d.]+)\s*(?:in|inches|cm)', soup.text)
+        height_match = re.search(r'Height\s*:\s*([\d.]+)\s*(?:in|inches|cm)', soup.text)
+        depth_match = re.search(r'Depth\s*:\s*([\d.]+)\s*(?:in|inches|cm)', soup.text)
+        
+        if width_match:
+            data['width'] = float(width_match.group(1))
+        if height_match:
+            data['height'] = float(height_match.group(1))
+        if depth_match:
+            data['depth'] = float(depth_match.group(1))
+    
+    # Try to extract weight
+    weight_pattern = r'Weight\s*:\s*([\d.]+)\s*(lb|lbs|kg|g)'
+    weight_match = re.search(weight_pattern, soup.text)
+    if weight_match:
+        data['weight'] = float(weight_match.group(1))
+        data['weight_unit'] = weight_match.group(2)
+    
+    # Try to extract price
+    price_pattern = r'\$\s*([\d,]+\.?\d*)'
+    price_match = re.search(price_pattern, soup.text)
+    if price_match:
+        data['price'] = float(price_match.group(1).replace(',', ''))
+    
+    # Try to extract color
+    color_pattern = r'Color\s*:\s*([A-Za-z]+)'
+    color_match = re.search(color_pattern, soup.text)
+    if color_match:
+        data['color'] = color_match.group(1)
+    
+    # Try to extract description
+    description_elements = soup.select('div.description, div.product-description, meta[name="description"]')
+    if description_elements:
+        for element in description_elements:
+            if element.name == 'meta':
+                data['description'] = element.get('content', '')
+            else:
+                data['description'] = element.text.strip()
+            break
+    
+    # Try to extract image URL
+    image_elements = soup.select('img.product-image, img.main-image')
+    if image_elements:
+        for img in image_elements:
+            src = img.get('src', '')
+            if src and (src.startswith('http') or src.startswith('/')):
+                data['image_url'] = src
+                break
+    
+    return data
+
+
+def load_fixtures(pad):
+    fixtures = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if not name.endswith('.html'):
+            continue
+        with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+            html = f.read()
+        if pad:
+            filler = ''.join(FILLER.format(i) for i in range(pad))
+            html = html.replace('</body>', filler + '</body>')
+        fixtures[name] = html
+    return fixtures
+
+
+def time_it(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (time.perf_counter() - started) / iterations, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--pad', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<22}{'size KB':>9}{'legacy ms':>12}{'engine ms':>12}{'speedup':>9}  fields")
+    for name, html in load_fixtures(args.pad).items():
+        legacy_time, legacy = time_it(
+            lambda: legacy_extract_data_from_page(BeautifulSoup(html, 'html.parser'), None),
+            args.iterations
+        )
+        engine_time, engine = time_it(lambda: page_extractor.extract(html), args.iterations)
+
+        diff = sorted(k for k in set(legacy) | set(engine) if legacy.get(k) != engine.get(k))
+        fields = 'same' if not diff else 'differ: ' + ', '.join(diff)
+        print(
+            f"{name:<22}{len(html) / 1024:>9.1f}{legacy_time * 1000:>12.3f}"
+            f"{engine_time * 1000:>12.3f}{legacy_time / engine_time:>8.1f}x  {fields}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Local stand-in for the scraped sites, replaying recorded HTML.
+
+Run from backend/scraper:
+
+    python benchmarks/replay_server.py [--port 8765] [--latency 20] [--pad 0]
+
+Routes:
+
+    /<site>/...     fixtures/recorded/<site>_search.html, for any path and query
+    /pages/<name>   fixtures/<name> or fixtures/recorded/<name>
+
+where ``<site>`` is the lower-cased adapter name (general, rockauto,
+autozone). ``{{base}}`` in a fixture is replaced with the server's own URL
+so recorded result links point back here. ``--latency`` delays every
+response to mimic a remote site; ``--pad`` appends that many blocks of
+filler markup to every page to mimic large real-world pages.
+"""
+import os
+import sys
+import time
+import argparse
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RECORDED_DIR = os.path.join(FIXTURES_DIR, 'recorded')
+
+FILLER = (
+    '<div class="related"><a href="/p/{0}">Related product {0}</a>'
+    '<p>Customers who viewed this item also viewed similar parts and accessories.</p></div>\n'
+)
+
+
+def load_pages(base, pad=0):
+    """
+    Map request paths to page bodies
+    """
+    filler = ''.join(FILLER.format(index) for index in range(pad))
+    pages = {}
+    for directory, recorded in ((FIXTURES_DIR, False), (RECORDED_DIR, True)):
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith('.html'):
+                continue
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                html = f.read().replace('{{base}}', base).replace('</body>', filler + '</body>')
+            pages[f"/pages/{name}"] = html.encode('utf-8')
+            if recorded and name.endswith('_search.html'):
+                pages[f"/{name[:-len('_search.html')]}"] = html.encode('utf-8')
+    return pages
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    pages = {}
+    latency = 0.0
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        body = self.pages.get(path)
+        if body is None:
+            # Search pages answer every path and query under their site prefix
+            body = self.pages.get('/' + path.strip('/').split('/')[0])
+        if self.latency:
+            time.sleep(self.latency)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, latency=0.0, pad=0):
+    """
+    Start the server and return it; its URL is ``http://127.0.0.1:<server.server_port>``
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), ReplayHandler)
+    server.daemon_threads = True
+    ReplayHandler.pages = load_pages(f"http://127.0.0.1:{server.server_port}", pad)
+    ReplayHandler.latency = latency
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=20, help='milliseconds added to every response')
+    parser.add_argument('--pad', type=int, default=0)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency / 1000, args.pad)
+    # The suite reads this line to find the port when started with --port 0
+    print(f"http://127.0.0.1:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
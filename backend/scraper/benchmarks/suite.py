@@ -0,0 +1,240 @@
+"""
+Offline benchmark suite for the scraper: search_general, search_auto_parts,
+extract_data_from_page and the browser engine's render_page against
+recorded pages.
+
+Run from backend/scraper:
+
+    python benchmarks/suite.py [--queries 20] [--iterations 200] [--latency 20] [--pad 0]
+                               [--engine selenium|playwright] [--pages 40] [--concurrency 4]
+                               [--output benchmarks/results/scraper-<commit>.json]
+                               [--baseline previous.json] [--only search_general,...]
+
+A replay server (benchmarks/replay_server.py) serves the recorded search
+and product pages, and the site adapters are rewritten to point at it, so
+no request leaves the machine. Adapters are switched to the HTTP tier
+unless --browser is given, which needs Chrome. Every query is distinct so
+the result cache never answers.
+
+render_page loads the recorded pages in the engine chosen with --engine,
+--concurrency at a time, and also reports the memory of the whole process
+tree (browsers included) and what each concurrent page adds to it; run it
+once per engine to compare them. It is skipped if the browser cannot start.
+
+Each benchmark runs in its own interpreter and the report (throughput,
+latency percentiles and peak RSS per benchmark) is written as JSON; with
+--baseline the run is compared against an earlier report and the exit
+status is 1 if anything regressed by more than --threshold.
+"""
+import os
+import sys
+import json
+import glob
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import harness  # noqa: E402
+
+BENCHMARKS = ('extract_data_from_page', 'search_auto_parts', 'search_general', 'render_page')
+
+
+def bench_extract_data_from_page(iterations, pad):
+    from app import extract_data_from_page, shutdown
+    from benchmarks.replay_server import load_pages
+
+    pages = [html.decode('utf-8') for path, html in sorted(load_pages('http://127.0.0.1', pad).items())
+             if path.startswith('/pages/')]
+    inputs = [pages[index % len(pages)] for index in range(iterations)]
+    result = harness.measure(lambda html: extract_data_from_page(html, 'brake rotor'), inputs, unit='page')
+    result['pages'] = len(pages)
+    shutdown()
+    return result
+
+
+def bench_search_auto_parts(queries):
+    from app import search_auto_parts, shutdown
+
+    found = []
+
+    def run(query):
+        found.append(len(search_auto_parts(query)))
+
+    result = harness.measure(run, [f"front brake rotor {index}" for index in range(queries)], unit='query')
+    result['results_per_query'] = round(sum(found) / len(found), 2)
+    shutdown()
+    return result
+
+
+def bench_search_general(queries):
+    from app import search_general, shutdown
+
+    found = []
+
+    def run(query):
+        found.append(len(search_general(query)))
+
+    result = harness.measure(run, [f"front brake rotor {index}" for index in range(queries)], unit='query')
+    result['results_per_query'] = round(sum(found) / len(found), 2)
+    shutdown()
+    return result
+
+
+def bench_render_page(base, pages, concurrency):
+    import app
+
+    urls = [f"{base}{path}" for path in ('/pages/product_page.html', '/pages/spec_sheet.html',
+                                         '/pages/listing_page.html', '/pages/camry_rotor_review.html')]
+    try:
+        app.warm_browser()
+    except Exception as e:
+        app.shutdown()
+        return {'skipped': f"{app.SCRAPER_ENGINE} browser did not start: {str(e).splitlines()[0]}"}
+    idle_rss = harness.process_tree_rss_mb()
+
+    # Sample the whole process tree, browser processes included, while pages load
+    peak = [idle_rss]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.1):
+            peak[0] = max(peak[0], harness.process_tree_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = harness.measure(
+            lambda index: app.fetcher.browser_fetch(urls[index % len(urls)], 'body', 15),
+            list(range(pages)), unit='page', warmup=concurrency, concurrency=concurrency
+        )
+    finally:
+        done.set()
+        sampler.join()
+        app.shutdown()
+
+    result.update({
+        'engine': app.SCRAPER_ENGINE,
+        'concurrency': concurrency,
+        'idle_tree_rss_mb': idle_rss,
+        'peak_tree_rss_mb': peak[0],
+        'rss_per_concurrent_page_mb': round((peak[0] - idle_rss) / concurrency, 1),
+    })
+    return result
+
+
+def write_adapters(base, directory, browser=False):
+    """
+    Copy the real site adapters into ``directory`` with their search URLs on the replay server
+    """
+    for path in glob.glob(os.path.join(ROOT, 'sites', '*.json')):
+        with open(path, encoding='utf-8') as f:
+            spec = json.load(f)
+        url = urlparse(spec['search_url'])
+        spec['search_url'] = f"{base}/{spec['name'].lower()}{url.path}" + (f"?{url.query}" if url.query else '')
+        # Every site is one local host; its rate limit comes from HOST_RATE_LIMIT instead
+        spec.pop('rate_limit', None)
+        if not browser:
+            spec['fetch'] = 'http'
+        with open(os.path.join(directory, os.path.basename(path)), 'w', encoding='utf-8') as f:
+            json.dump(spec, f)
+
+
+def start_replay_server(latency, pad):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'replay_server.py'),
+         '--port', '0', '--latency', str(latency), '--pad', str(pad)],
+        stdout=subprocess.PIPE, text=True
+    )
+    base = process.stdout.readline().strip()
+    if not base:
+        process.kill()
+        raise RuntimeError('Replay server did not start')
+    return process, base
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=20, help='milliseconds the replay server adds per response')
+    parser.add_argument('--pad', type=int, default=0)
+    parser.add_argument('--browser', action='store_true', help="keep each adapter's fetch tier (needs Chrome)")
+    parser.add_argument('--engine', choices=('selenium', 'playwright'), default=os.environ.get('SCRAPER_ENGINE', 'selenium'))
+    parser.add_argument('--pages', type=int, default=40, help='pages loaded by render_page')
+    parser.add_argument('--concurrency', type=int, default=4, help='pages render_page loads at once')
+    parser.add_argument('--only', help='comma-separated benchmarks to run')
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    selected = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    work_dir = tempfile.mkdtemp(prefix='scraper-bench-')
+    server, base = start_replay_server(args.latency, args.pad)
+    sites_dir = os.path.join(work_dir, 'sites')
+    os.makedirs(sites_dir)
+    write_adapters(base, sites_dir, args.browser)
+
+    # Read by app.py in each spawned benchmark process
+    os.environ.update({
+        'SITES_DIR': sites_dir,
+        'JOBS_DB_PATH': os.path.join(work_dir, 'jobs.db'),
+        'HOST_RATE_LIMIT': '100000',
+        'HOST_RATE_BURST': '100000',
+        'SCRAPER_ENGINE': args.engine,
+        'DRIVER_POOL_SIZE': str(args.concurrency),
+        'PLAYWRIGHT_MAX_PAGES': str(args.concurrency),
+    })
+    os.environ.pop('SEARCH_CACHE_PATH', None)
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+    runs = {
+        'extract_data_from_page': lambda: harness.run_isolated(
+            bench_extract_data_from_page, iterations=args.iterations, pad=args.pad),
+        'search_auto_parts': lambda: harness.run_isolated(bench_search_auto_parts, queries=args.queries),
+        'search_general': lambda: harness.run_isolated(bench_search_general, queries=args.queries),
+        'render_page': lambda: harness.run_isolated(
+            bench_render_page, base=base, pages=args.pages, concurrency=args.concurrency),
+    }
+
+    results = {}
+    try:
+        for name in selected:
+            print(f"running {name}...", file=sys.stderr)
+            results[name] = runs[name]()
+    finally:
+        server.terminate()
+        server.wait()
+
+    config = {
+        'queries': args.queries,
+        'iterations': args.iterations,
+        'latency_ms': args.latency,
+        'pad': args.pad,
+        'browser': args.browser,
+        'engine': args.engine,
+        'pages': args.pages,
+        'concurrency': args.concurrency,
+    }
+    report = harness.build_report('scraper', config, results, ROOT)
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"scraper-{report['commit']}.json")
+    harness.write_report(report, output)
+    harness.print_summary(report)
+    print(f"\nwrote {output}")
+
+    if args.baseline:
+        return 1 if harness.compare(report, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """
+    Canonical form of a search query used for cache keys and deduplication
+    """
+    return _WHITESPACE.sub(' ', query).strip().lower()
+
+
+class PartialResults(list):
+    """
+    Results a source returned after being cut short (a deadline passed
+    before all of its pages finished). Callers get them as usual, but they
+    are never cached, so one slow page or one client's short deadline does
+    not lower what everyone else is served.
+    """
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._inflight)
+
+
+class SQLiteStore:
+    """
+    On-disk backing store so cached results survive restarts
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._conn.commit()
+
+    @property
+    def _conn(self):
+        # Connections must not cross a fork (gunicorn --preload), so each process opens its own
+        if self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS search_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            conn.commit()
+            self._connection = conn
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, stored_at FROM search_cache WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO search_cache (key, value, stored_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), stored_at)
+            )
+            self._conn.commit()
+
+    def purge(self, older_than):
+        with self._lock:
+            self._conn.execute('DELETE FROM search_cache WHERE stored_at < ?', (older_than,))
+            self._conn.commit()
+
+
+class SearchCache:
+    """
+    Per-source result cache with stale-while-revalidate.
+
+    Entries are keyed on the source name and the normalized query. An entry
+    is fresh for its source's TTL; for ``stale_ttl`` seconds after that it is
+    still served immediately while a background refresh replaces it. Entries
+    live in a bounded in-process LRU, optionally backed by SQLite.
+    """
+
+    def __init__(self, executor, ttls=None, default_ttl=3600, stale_ttl=86400, max_entries=1000, path=None):
+        self.executor = executor
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.store = SQLiteStore(path) if path else None
+
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self.flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0,
+        }
+
+        if self.store is not None:
+            self.store.purge(time.time() - self._max_lifetime())
+
+    def _max_lifetime(self):
+        return max([self.default_ttl] + list(self.ttls.values())) + self.stale_ttl
+
+    def ttl_for(self, source):
+        return self.ttls.get(source, self.default_ttl)
+
+    @staticmethod
+    def key_for(source, query):
+        return f"{source}:{normalize_query(query)}"
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.store is None:
+            return None
+        entry = self.store.get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def set(self, source, query, results):
+        key = self.key_for(source, query)
+        entry = (results, time.time())
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.set(key, results, entry[1])
+
+    def _refresh(self, key, source, query, compute):
+        try:
+            results = compute()
+            if results and not isinstance(results, PartialResults):
+                self.set(source, query, results)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            logger.error(f"Background refresh of {key} failed: {str(e)}")
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key, source, query, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self.executor.submit(self._refresh, key, source, query, compute)
+
+    def get_or_compute(self, source, query, compute):
+        """
+        Return cached results for ``source``/``query``, calling ``compute``
+        on a miss. Concurrent misses for the same key share one ``compute``
+        call. Empty results are not cached since they usually mean the site
+        failed or timed out, and neither are PartialResults.
+        """
+        key = self.key_for(source, query)
+        entry = self._lookup(key)
+
+        if entry is not None:
+            results, stored_at = entry
+            age = time.time() - stored_at
+            ttl = self.ttl_for(source)
+            if age <= ttl:
+                with self._lock:
+                    self._stats['hits'] += 1
+                metrics.cache_lookup(source, 'hit')
+                return results
+            if age <= ttl + self.stale_ttl:
+                with self._lock:
+                    self._stats['stale_hits'] += 1
+                metrics.cache_lookup(source, 'stale')
+                self._schedule_refresh(key, source, query, compute)
+                return results
+
+        with self._lock:
+            self._stats['misses'] += 1
+        metrics.cache_lookup(source, 'miss')
+
+        def compute_and_store():
+            results = compute()
+            if results and not isinstance(results, PartialResults):
+                self.set(source, query, results)
+            return results
+
+        return self.flights.do(key, compute_and_store)
+
+    def cached(self, source, query, func, *args, **kwargs):
+        """
+        Wrap ``func(*args, **kwargs)`` so it can be scheduled through the cache
+        """
+        def run():
+            return self.get_or_compute(source, query, lambda: func(*args, **kwargs))
+        return run
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['refreshing'] = len(self._refreshing)
+        stats['in_flight'] = self.flights.in_flight()
+        stats['coalesced'] = self.flights.coalesced
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+        stats['persistent'] = self.store is not None
+        return stats
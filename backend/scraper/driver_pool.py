@@ -0,0 +1,304 @@
+import time
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Substrings of WebDriver errors that indicate a dead or crashed browser
+SESSION_ERROR_MARKERS = (
+    'invalid session id',
+    'session deleted',
+    'chrome not reachable',
+    'tab crashed',
+    'disconnected',
+    'target window already closed',
+)
+
+
+class DriverPoolExhausted(Exception):
+    """
+    Raised when no driver becomes available before the checkout timeout
+    """
+
+
+class PooledDriver:
+    """
+    A WebDriver together with the bookkeeping the pool needs to recycle it
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.pages = 0
+        self.broken = False
+
+
+class DriverPool:
+    """
+    Bounded, thread-safe pool of pre-launched WebDriver instances.
+
+    Drivers are started lazily up to ``size`` and handed out with
+    ``checkout()``. On return the driver's cookies and storage are cleared so
+    no state leaks between searches. A driver is recycled (quit and replaced)
+    once it has served ``max_pages`` page loads, exceeded ``max_age`` seconds,
+    failed a health check or was marked broken by the caller.
+    """
+
+    def __init__(self, factory, size=2, max_pages=50, max_age=1800, checkout_timeout=60):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        # Drivers currently checked out, keyed by id() so callers can report page loads
+        self._in_use = {}
+
+        self._stats = {
+            'checkouts': 0,
+            'started': 0,
+            'recycled': 0,
+            'failed_health_checks': 0,
+            'start_failures': 0,
+            'wait_timeouts': 0,
+            'saturated': 0,
+            'total_wait_seconds': 0.0,
+        }
+
+    def warm(self, count=None):
+        """
+        Pre-launch drivers so the first requests do not pay the browser boot
+        """
+        count = self.size if count is None else min(count, self.size)
+        for _ in range(count):
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            try:
+                self._idle.put(self._start())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def _start(self):
+        try:
+            with metrics.stage('driver_start'):
+                pooled = PooledDriver(self.factory())
+        except Exception:
+            with self._lock:
+                self._stats['start_failures'] += 1
+            raise
+        with self._lock:
+            self._stats['started'] += 1
+        return pooled
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting WebDriver: {str(e)}")
+        with self._lock:
+            self._created -= 1
+            self._stats['recycled'] += 1
+
+    def _is_healthy(self, pooled):
+        if pooled.broken:
+            return False
+        if pooled.pages >= self.max_pages:
+            return False
+        if time.monotonic() - pooled.created_at > self.max_age:
+            return False
+        try:
+            # Any round-trip to the browser proves the session is still alive
+            pooled.driver.execute_script('return 1')
+        except Exception:
+            with self._lock:
+                self._stats['failed_health_checks'] += 1
+            return False
+        return True
+
+    def _reset(self, pooled):
+        """
+        Clear per-session state so the next checkout starts from a clean browser.
+
+        Cookies are cleared browser-wide, so those set by redirects, iframes
+        and earlier pages go too. Storage (local, session, IndexedDB, cache
+        and service workers) is cleared for every origin in the current
+        page's frame tree, which includes iframes and the origin a redirect
+        ended on. The driver is parked on about:blank first so no page script
+        writes them back.
+        """
+        driver = pooled.driver
+        origins = set()
+        frames = [driver.execute_cdp_cmd('Page.getFrameTree', {})['frameTree']]
+        while frames:
+            node = frames.pop()
+            origin = node['frame'].get('securityOrigin', '')
+            if origin.startswith(('http://', 'https://')):
+                origins.add(origin)
+            frames.extend(node.get('childFrames', []))
+
+        driver.get('about:blank')
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        for origin in origins:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+
+    def _acquire(self):
+        """
+        Return an idle, new or waited-for driver, and whether every driver was busy
+        """
+        deadline = time.monotonic() + self.checkout_timeout
+        saturated = False
+        while True:
+            if self._closed:
+                raise DriverPoolExhausted('Driver pool is closed')
+
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = None
+
+            if pooled is None:
+                with self._lock:
+                    can_start = self._created < self.size
+                    if can_start:
+                        self._created += 1
+                if can_start:
+                    try:
+                        return self._start(), saturated
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+
+                saturated = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self._stats['wait_timeouts'] += 1
+                    raise DriverPoolExhausted(
+                        f"No WebDriver available after {self.checkout_timeout}s"
+                    )
+                try:
+                    pooled = self._idle.get(timeout=min(remaining, 1.0))
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(pooled):
+                return pooled, saturated
+            self._discard(pooled)
+
+    def _release(self, pooled):
+        if self._closed or pooled.broken:
+            self._discard(pooled)
+            return
+        try:
+            self._reset(pooled)
+        except Exception as e:
+            logger.warning(f"Error resetting WebDriver, recycling it: {str(e)}")
+            self._discard(pooled)
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def checkout(self):
+        """
+        Borrow a driver for the duration of a ``with`` block.
+
+        An exception escaping the block that looks like a browser crash marks
+        the driver as broken so it is replaced instead of being reused.
+        """
+        started = time.monotonic()
+        try:
+            pooled, saturated = self._acquire()
+        except DriverPoolExhausted:
+            metrics.pool_checkout('driver', time.monotonic() - started, True)
+            raise
+        waited = time.monotonic() - started
+        metrics.pool_checkout('driver', waited, saturated)
+        metrics.POOL_IN_USE.labels('driver').inc()
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['saturated'] += int(saturated)
+            self._stats['total_wait_seconds'] += waited
+            self._in_use[id(pooled.driver)] = pooled
+
+        try:
+            yield pooled.driver
+        except Exception as e:
+            if _is_session_error(e):
+                pooled.broken = True
+            raise
+        finally:
+            with self._lock:
+                self._in_use.pop(id(pooled.driver), None)
+            metrics.POOL_IN_USE.labels('driver').dec()
+            self._release(pooled)
+
+    def record_page(self, driver):
+        """
+        Count a page load against the driver's recycle budget
+        """
+        with self._lock:
+            pooled = self._in_use.get(id(driver))
+            if pooled is not None:
+                pooled.pages += 1
+
+    def report_error(self, driver, error):
+        """
+        Mark a checked-out driver for recycling if ``error`` looks like a crash.
+
+        Use this where callers catch exceptions inside the ``with`` block and
+        so never let them reach ``checkout()``.
+        """
+        if not _is_session_error(error):
+            return
+        with self._lock:
+            pooled = self._in_use.get(id(driver))
+            if pooled is not None:
+                pooled.broken = True
+
+    def close(self):
+        """
+        Quit every idle driver and stop handing out new ones
+        """
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['live'] = self._created
+        stats['idle'] = self._idle.qsize()
+        stats['in_use'] = stats['live'] - stats['idle']
+        stats['avg_wait_seconds'] = (
+            round(stats['total_wait_seconds'] / stats['checkouts'], 4)
+            if stats['checkouts'] else 0.0
+        )
+        stats['total_wait_seconds'] = round(stats['total_wait_seconds'], 4)
+        return stats
+
+
+def _is_session_error(error):
+    """
+    Heuristic for exceptions that mean the browser session itself is gone
+    """
+    if type(error).__name__ in ('InvalidSessionIdException', 'NoSuchWindowException'):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in SESSION_ERROR_MARKERS)
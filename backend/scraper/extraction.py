@@ -0,0 +1,284 @@
+import re
+import logging
+import lxml.html
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Field patterns, in priority order within each field. Each pattern's
+# capture groups are turned into named groups in the combined scanner.
+FIELD_PATTERNS = [
+    ('part_number', r'Part\s*#?\s*:\s*([A-Z0-9-]+)'),
+    ('part_number', r'Part\s*Number\s*:\s*([A-Z0-9-]+)'),
+    ('part_number', r'Item\s*#?\s*:\s*([A-Z0-9-]+)'),
+    ('part_number', r'SKU\s*:\s*([A-Z0-9-]+)'),
+    ('vehicle', r'for\s+([A-Za-z]+)\s+([A-Za-z0-9]+)'),
+    ('dimensions', r'Dimensions\s*:\s*([\d.]+)\s*x\s*([\d.]+)\s*x\s*([\d.]+)\s*(?:in|inches|cm)'),
+    ('width', r'Width\s*:\s*([\d.]+)\s*(?:in|inches|cm)'),
+    ('height', r'Height\s*:\s*([\d.]+)\s*(?:in|inches|cm)'),
+    ('depth', r'Depth\s*:\s*([\d.]+)\s*(?:in|inches|cm)'),
+    ('weight', r'Weight\s*:\s*([\d.]+)\s*(lb|lbs|kg|g)'),
+    ('price', r'\$\s*([\d,]+\.?\d*)'),
+    ('color', r'Color\s*:\s*([A-Za-z]+)'),
+]
+
+_CLASS_TEST = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+
+# Same elements as the CSS selectors the scraper has always used, in document order
+_DESCRIPTION_XPATH = etree.XPath(
+    f"//div[{_CLASS_TEST.format('description')}]"
+    f" | //div[{_CLASS_TEST.format('product-description')}]"
+    " | //meta[@name='description']"
+)
+_IMAGE_XPATH = etree.XPath(
+    f"//img[{_CLASS_TEST.format('product-image')} or {_CLASS_TEST.format('main-image')}]"
+)
+_VISIBLE_TEXT_XPATH = etree.XPath(
+    '//text()[not(ancestor::script or ancestor::style or ancestor::noscript or ancestor::template)]'
+)
+
+_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+
+_CAPTURE_GROUP = re.compile(r'(?<!\\)\((?!\?)')
+
+# Numbered or named backreferences, which would point at the wrong group once
+# the pattern is one alternative among many
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=|\\g<')
+
+
+def _compile_scanner(field_patterns):
+    """
+    Combine all field patterns into one regex.
+
+    Every alternative is wrapped in a lookahead so the scan tests each
+    pattern at every position without consuming text. An alternation only
+    reports the first alternative that matches at a position, so ``scan``
+    tries the later patterns again there; together that keeps the "first
+    occurrence of each pattern" semantics of one re.search per pattern
+    while walking the text only once. When every pattern starts
+    with a literal character, a one-character class in front lets the
+    engine skip most positions cheaply.
+
+    Patterns whose groups cannot be renamed faithfully (named groups,
+    backreferences, parentheses in a character class, inline global flags)
+    are left out of the scanner and returned in ``separate``, for ``scan``
+    to search on their own.
+    """
+    alternatives = []
+    slots = []
+    separate = []
+    first_chars = set()
+    for index, (field, pattern) in enumerate(field_patterns):
+        group_count = [0]
+
+        def name_group(match):
+            group_count[0] += 1
+            return f"(?P<p{index}_{group_count[0]}>"
+
+        named = _CAPTURE_GROUP.sub(name_group, pattern)
+        alternative = f"(?P<p{index}>{named})"
+        slots.append((field, index, group_count[0]))
+        if not _combinable(pattern, alternative, group_count[0]):
+            separate.append(index)
+            continue
+        alternatives.append(alternative)
+        if first_chars is not None:
+            first_chars = _leading_literal(pattern, first_chars)
+
+    if not alternatives:
+        return None, slots, separate
+    scanner = '(?=' + '|'.join(alternatives) + ')'
+    if first_chars:
+        scanner = '(?=[' + ''.join(re.escape(c) for c in sorted(first_chars)) + '])' + scanner
+    return re.compile(scanner), slots, separate
+
+
+def _combinable(pattern, alternative, group_count):
+    """
+    Whether ``alternative`` (``pattern`` with its groups renamed) captures
+    exactly what ``pattern`` does when it is one branch of the scanner
+    """
+    compiled = re.compile(pattern)
+    if compiled.groupindex or _BACKREFERENCE.search(pattern):
+        return False
+    try:
+        renamed = re.compile('(?=' + alternative + ')')
+    except re.error:
+        return False
+    return compiled.groups == group_count and renamed.groups == group_count + 1
+
+
+def _leading_literal(pattern, first_chars):
+    """
+    Add the literal first character of ``pattern`` to ``first_chars``, or
+    return None if the pattern can start with something else
+    """
+    if _has_top_level_branch(pattern):
+        return None
+    if len(pattern) > 1 and pattern[0] == '\\' and not pattern[1].isalnum():
+        char = pattern[1]
+    elif pattern[:1].isalnum() and pattern[1:2] not in ('?', '*', '{', '|'):
+        char = pattern[0]
+    else:
+        return None
+    first_chars.add(char)
+    return first_chars
+
+
+def _has_top_level_branch(pattern):
+    """
+    Whether ``pattern`` has a ``|`` outside any group or character class,
+    so that it can start with the first character of another branch
+    """
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '[':
+            index += 1
+            if pattern[index:index + 1] == '^':
+                index += 1
+            # A ']' first in the class is a literal
+            if pattern[index:index + 1] == ']':
+                index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                index += 2 if pattern[index] == '\\' else 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        index += 1
+    return False
+
+
+class PageExtractor:
+    """
+    Single-pass extractor for structured data on product and spec pages.
+
+    The HTML is parsed once with lxml, the visible text (excluding script,
+    style and template content) is joined once, and all field patterns run
+    in one precompiled scan.
+    """
+
+    def __init__(self, field_patterns=None):
+        self.field_patterns = field_patterns or FIELD_PATTERNS
+        self.scanner, self.slots, self.separate = _compile_scanner(self.field_patterns)
+        self.patterns = [re.compile(pattern) for _, pattern in self.field_patterns]
+        self.combined = [index for index in range(len(self.slots)) if index not in self.separate]
+
+    def scan(self, text):
+        """
+        Map each pattern index to the groups of its first match in ``text``
+        """
+        first = {}
+        wanted = len(self.combined)
+        for match in (self.scanner.finditer(text) if self.scanner is not None else ()):
+            index = int(match.lastgroup[1:])
+            if index not in first:
+                group_count = self.slots[index][2]
+                first[index] = tuple(match.group(f"p{index}_{n}") for n in range(1, group_count + 1))
+            # Earlier alternatives failed here, but later ones may match at the same position too
+            position = match.start()
+            for later in self.combined:
+                if later > index and later not in first:
+                    same_start = self.patterns[later].match(text, position)
+                    if same_start:
+                        first[later] = same_start.groups()
+            if len(first) == wanted:
+                break
+        for index in self.separate:
+            match = self.patterns[index].search(text)
+            if match:
+                first[index] = match.groups()
+        return first
+
+    def first_for(self, matches, field):
+        """
+        Groups of the highest-priority pattern for ``field`` that matched
+        """
+        for slot_field, index, _ in self.slots:
+            if slot_field == field and index in matches:
+                return matches[index]
+        return None
+
+    def extract(self, html, query=None):
+        data = {}
+
+        tree = parse_html(html)
+        if tree is None:
+            return data
+
+        matches = self.scan(''.join(_VISIBLE_TEXT_XPATH(tree)))
+
+        part_number = self.first_for(matches, 'part_number')
+        if part_number:
+            data['part_number'] = part_number[0]
+
+        vehicle = self.first_for(matches, 'vehicle')
+        if vehicle:
+            data['vehicle_make'] = vehicle[0]
+            data['vehicle_model'] = vehicle[1]
+
+        dimensions = self.first_for(matches, 'dimensions')
+        if dimensions:
+            data['width'] = float(dimensions[0])
+            data['height'] = float(dimensions[1])
+            data['depth'] = float(dimensions[2])
+        else:
+            for field in ('width', 'height', 'depth'):
+                value = self.first_for(matches, field)
+                if value:
+                    data[field] = float(value[0])
+
+        weight = self.first_for(matches, 'weight')
+        if weight:
+            data['weight'] = float(weight[0])
+            data['weight_unit'] = weight[1]
+
+        price = self.first_for(matches, 'price')
+        if price:
+            data['price'] = float(price[0].replace(',', ''))
+
+        color = self.first_for(matches, 'color')
+        if color:
+            data['color'] = color[0]
+
+        for element in _DESCRIPTION_XPATH(tree):
+            if element.tag == 'meta':
+                data['description'] = element.get('content', '')
+            else:
+                data['description'] = element.text_content().strip()
+            break
+
+        for img in _IMAGE_XPATH(tree):
+            src = img.get('src', '')
+            if src and (src.startswith('http') or src.startswith('/')):
+                data['image_url'] = src
+                break
+
+        return data
+
+
+def parse_html(html):
+    """
+    Parse a page with lxml, tolerating empty documents and encoding declarations
+    """
+    if not html or not html.strip():
+        return None
+    if isinstance(html, str):
+        # lxml rejects str input that carries an XML encoding declaration
+        html = html.encode('utf-8', 'replace')
+    try:
+        return lxml.html.document_fromstring(html, parser=_PARSER)
+    except (etree.ParserError, ValueError) as e:
+        logger.warning(f"Could not parse page HTML: {str(e)}")
+        return None
+
+
+# Shared extractor used by the scraper
+page_extractor = PageExtractor()
@@ -0,0 +1,182 @@
+import os
+import asyncio
+import logging
+import threading
+import aiohttp
+from bs4 import BeautifulSoup
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class FetchResult:
+    """
+    HTML for a page along with the tier that produced it ('http' or 'browser')
+    """
+
+    def __init__(self, url, html, tier, soup=None):
+        self.url = url
+        self.html = html
+        self.tier = tier
+        self._soup = soup
+
+    @property
+    def soup(self):
+        # Parse at most once per page, with lxml rather than html.parser
+        if self._soup is None:
+            with metrics.stage('parse'):
+                self._soup = BeautifulSoup(self.html, 'lxml')
+        return self._soup
+
+
+class TieredFetcher:
+    """
+    Fetch pages over plain HTTP first and fall back to a real browser.
+
+    HTTP requests share one pooled aiohttp session (keep-alive, per-host
+    connection limit) running on a background event loop, so synchronous
+    Flask handlers and worker threads can use it without their own loop.
+    A page is handed to ``browser_fetch`` when the caller says it needs JS
+    rendering, when the HTTP fetch fails, or when ``required_selector`` is
+    missing from the server-rendered HTML.
+
+    With ``guards`` (a HostGuards) every fetch goes through the target
+    host's rate limit, retry budget and circuit breaker; ``retryable``
+    decides which errors are worth another attempt.
+    """
+
+    def __init__(self, browser_fetch, limit=100, limit_per_host=4, timeout=10, keepalive_timeout=30,
+                 guards=None, retryable=lambda error: True):
+        self.browser_fetch = browser_fetch
+        self.guards = guards
+        self.retryable = retryable
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._session = None
+        self._pid = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'http': 0,
+            'browser': 0,
+            'http_errors': 0,
+            'selector_misses': 0,
+        }
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _ensure_loop(self):
+        # Start the loop lazily so each forked worker gets its own
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='http-fetcher', daemon=True)
+            thread.start()
+            self._loop = loop
+            self._session = None
+            self._pid = os.getpid()
+            return loop
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def _fetch_http(self, url):
+        session = await self._get_session()
+        async with session.get(url, allow_redirects=True) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=f"HTTP {response.status}"
+                )
+            content_type = response.headers.get('Content-Type', '')
+            if 'html' not in content_type and 'xml' not in content_type:
+                raise ValueError(f"Unexpected content type {content_type!r}")
+            return await response.text(errors='replace')
+
+    def fetch_http(self, url, timeout=None):
+        """
+        Fetch ``url`` over pooled HTTP from synchronous code
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._fetch_http(url), loop)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def fetch(self, url, render_js=False, required_selector=None, timeout=None):
+        """
+        Return a FetchResult for ``url`` using the cheapest tier that works
+        """
+        if self.guards is None:
+            return self._fetch(url, render_js, required_selector, timeout)
+        return self.guards.call(
+            url,
+            lambda: self._fetch(url, render_js, required_selector, timeout),
+            retryable=self.retryable
+        )
+
+    def _fetch(self, url, render_js, required_selector, timeout):
+        if not render_js:
+            try:
+                with metrics.stage('http_fetch'):
+                    html = self.fetch_http(url, timeout=timeout)
+                result = FetchResult(url, html, 'http')
+                if not required_selector or result.soup.select_one(required_selector) is not None:
+                    self._count('http')
+                    return result
+                self._count('selector_misses')
+                logger.info(f"Selector {required_selector!r} missing from HTTP response for {url}, using browser")
+            except Exception as e:
+                self._count('http_errors')
+                logger.info(f"HTTP fetch failed for {url} ({str(e)}), using browser")
+
+        html = self.browser_fetch(url, required_selector, timeout or self.timeout)
+        self._count('browser')
+        return FetchResult(url, html, 'browser')
+
+    def close(self):
+        """
+        Close the HTTP session and stop the background loop
+        """
+        with self._lock:
+            loop, session = self._loop, self._session
+            self._loop = self._session = None
+        if loop is None:
+            return
+        if session is not None:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
@@ -0,0 +1,71 @@
+"""
+Gunicorn settings for the scraper service.
+
+Scraping is I/O-bound (waiting on sites and on Chrome), so a few worker
+processes each serve many requests on threads. Every worker owns its own
+WebDriver pool, so workers x DRIVER_POOL_SIZE Chrome instances can run
+(with SCRAPER_ENGINE=playwright, one Chromium per worker instead).
+
+    gunicorn app:app
+
+reads this file from the working directory. Every setting can be
+overridden with the environment variables below.
+"""
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5002)}"
+
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+worker_class = 'gthread'
+
+# Import selenium, lxml and the site adapters once in the master and fork
+# workers from it. Browsers, HTTP sessions and SQLite connections are all
+# created lazily in each worker, never in the master.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Scrapes can legitimately take most of a minute; streamed responses keep
+# the worker busy until the last source reports
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# On SIGTERM, stop accepting and let in-flight scrapes finish
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers to bound memory growth from Chrome and parsed pages; the
+# jitter keeps all workers from restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Workers write their metrics to files here and /metrics sums them, so a
+# scrape sees every worker rather than whichever one answered. Cleared on
+# each start so counters from a previous run do not carry over.
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'scraper-metrics'))
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    # Start browsers and job runners in the worker that will use them, never in the master
+    from app import warm_browser, job_queue
+    if os.environ.get('DRIVER_POOL_WARM', 'False').lower() == 'true':
+        warm_browser()
+    job_queue.start()
+
+
+def worker_exit(server, worker):
+    # In-flight requests have drained by now; hand back unfinished jobs, quit Chrome and close sessions
+    from app import shutdown
+    shutdown()
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (pool checkouts in use) from /metrics
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,163 @@
+import fnmatch
+import logging
+
+logger = logging.getLogger(__name__)
+
+# URL patterns (Chrome's setBlockedURLs wildcards) for each blockable resource
+# type. Each extension is listed with and without a query string.
+RESOURCE_PATTERNS = {
+    'images': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'),
+    'media': ('mp4', 'webm', 'm3u8', 'ts', 'mp3', 'ogg', 'wav', 'mov'),
+    'fonts': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'stylesheets': ('css',),
+    'scripts': ('js', 'mjs'),
+}
+
+# The same types as named by engines that intercept requests (Playwright)
+RESOURCE_TYPES = {
+    'images': 'image',
+    'media': 'media',
+    'fonts': 'font',
+    'stylesheets': 'stylesheet',
+    'scripts': 'script',
+}
+
+# Ad, analytics, tag-manager and session-replay hosts seen on search and
+# retailer pages; none of them carry product data
+THIRD_PARTY_DOMAINS = (
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googletagservices.com',
+    'adservice.google.com',
+    'facebook.net',
+    'connect.facebook.com',
+    'amazon-adsystem.com',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'hotjar.com',
+    'fullstory.com',
+    'clarity.ms',
+    'newrelic.com',
+    'nr-data.net',
+    'optimizely.com',
+    'bing.com/bat',
+    'bat.bing.com',
+    'tiqcdn.com',
+    'demdex.net',
+    'omtrdc.net',
+    'adsrvr.org',
+    'pinterest.com/ct',
+    'tiktok.com/i18n/pixel',
+    'snapchat.com',
+)
+
+BLOCKABLE = tuple(RESOURCE_PATTERNS) + ('third_party',)
+
+
+class LoadingProfile:
+    """
+    What the browser may load for a page.
+
+    ``block`` names resource types from BLOCKABLE; ``allow`` lists URL
+    patterns (``*`` wildcards) that stay loadable even though a blocked type
+    or domain matches them, typically the scripts a site needs to render its
+    product data (block ``scripts`` and allow just those). Only engines that
+    intercept requests honour that exactly; for Chrome's URL blocking an
+    allowed URL can only drop the block patterns it overlaps (see
+    ``unblocked_urls``). With ``javascript`` off the page's scripts do not
+    run at all, for sites whose listings are in the server-rendered HTML.
+    """
+
+    def __init__(self, block=('images', 'media', 'fonts', 'third_party'), allow=(), javascript=True):
+        unknown = set(block) - set(BLOCKABLE)
+        if unknown:
+            raise ValueError(f"Unknown resource types to block: {', '.join(sorted(unknown))}")
+        self.block = tuple(block)
+        self.allow = tuple(allow)
+        self.javascript = javascript
+        patterns = self._block_patterns()
+        # Chrome has no allow rule, so an allowed URL unblocks every pattern it matches
+        self.unblocked_urls = [
+            pattern for pattern in patterns if any(_matches(allowed, pattern) for allowed in self.allow)
+        ]
+        self.blocked_urls = [pattern for pattern in patterns if pattern not in self.unblocked_urls]
+        self._blocked_types = {RESOURCE_TYPES[kind] for kind in self.block if kind in RESOURCE_TYPES}
+
+    @classmethod
+    def from_spec(cls, spec, default):
+        """
+        Build a site's profile from the ``loading`` object of its adapter
+        file, falling back to ``default`` for fields it leaves out
+        """
+        if not spec:
+            return default
+        return cls(
+            block=spec.get('block', default.block),
+            allow=spec.get('allow', default.allow),
+            javascript=spec.get('javascript', default.javascript)
+        )
+
+    def _block_patterns(self):
+        patterns = []
+        for kind in self.block:
+            if kind == 'third_party':
+                patterns.extend(f"*{domain}*" for domain in THIRD_PARTY_DOMAINS)
+            else:
+                for extension in RESOURCE_PATTERNS[kind]:
+                    patterns.extend((f"*.{extension}", f"*.{extension}?*"))
+        return patterns
+
+    def blocks_request(self, url, resource_type):
+        """
+        Whether an intercepted request should be aborted. Unlike
+        ``blocked_urls`` the allow-list is exact here: an allowed URL is let
+        through and nothing else is.
+        """
+        if any(fnmatch.fnmatchcase(url, pattern) for pattern in self.allow):
+            return False
+        if resource_type in self._blocked_types:
+            return True
+        return 'third_party' in self.block and any(domain in url for domain in THIRD_PARTY_DOMAINS)
+
+    @property
+    def key(self):
+        return (tuple(self.blocked_urls), self.javascript)
+
+    def to_dict(self):
+        return {'block': list(self.block), 'allow': list(self.allow), 'javascript': self.javascript}
+
+
+def _matches(allowed, pattern):
+    """
+    Whether a URL pattern in the allow-list overlaps a block pattern
+    """
+    core = pattern.strip('*')
+    allowed_core = allowed.strip('*')
+    return core in allowed_core or allowed_core in core
+
+
+def apply_profile(driver, profile):
+    """
+    Install ``profile`` on a Chrome driver through the DevTools protocol.
+
+    Settings persist for the driver's session, so they are only sent when
+    they differ from what the driver last had.
+    """
+    if getattr(driver, 'loading_profile_key', None) == profile.key:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': profile.blocked_urls})
+        driver.execute_cdp_cmd('Emulation.setScriptExecutionDisabled', {'value': not profile.javascript})
+    except Exception as e:
+        # Blocking is an optimization; load the page in full rather than fail
+        logger.warning(f"Could not apply browser loading profile: {str(e)}")
+        return
+    driver.loading_profile_key = profile.key
@@ -0,0 +1,233 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import metrics
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+except ImportError:  # pragma: no cover - only needed when SCRAPER_ENGINE=playwright
+    async_playwright = None
+    PlaywrightTimeoutError = None
+
+logger = logging.getLogger(__name__)
+
+
+class RenderTimeout(TimeoutError):
+    """
+    Raised when a page or its ready selector does not load in time
+    """
+
+
+class PlaywrightEngine:
+    """
+    Render pages with one headless Chromium and a fresh context per page.
+
+    Everything runs on a background asyncio loop, so synchronous Flask
+    handlers and worker threads call ``render_page`` exactly as they would
+    the Selenium one. Contexts are cheap (no new browser process), isolated
+    (no shared cookies or storage) and at most ``max_pages`` are open at
+    once. Requests are intercepted and aborted according to the loading
+    profile for the URL. The browser is launched on first use and relaunched
+    if it crashes.
+    """
+
+    def __init__(self, loading_for, max_pages=8, user_agent=None, launch_args=(), network_idle_timeout=5):
+        if async_playwright is None:
+            raise RuntimeError('SCRAPER_ENGINE=playwright needs the playwright package and its Chromium')
+        self.loading_for = loading_for
+        self.max_pages = max_pages
+        self.user_agent = user_agent
+        self.launch_args = list(launch_args)
+        self.network_idle_timeout = network_idle_timeout
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+        self._playwright = None
+        self._browser = None
+        self._launching = None
+        self._slots = None
+        self._open_pages = 0
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'launches': 0,
+            'pages': 0,
+            'timeouts': 0,
+            'errors': 0,
+            'blocked_requests': 0,
+            'saturated': 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _ensure_loop(self):
+        # Start the loop lazily so each forked worker gets its own browser
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='playwright', daemon=True)
+            thread.start()
+            self._loop = loop
+            self._pid = os.getpid()
+            self._playwright = self._browser = self._launching = None
+            self._slots = None
+            self._open_pages = 0
+            return loop
+
+    def _call(self, coroutine, timeout):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    async def _get_browser(self):
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+        # Concurrent callers share one launch
+        if self._launching is None:
+            self._launching = asyncio.ensure_future(self._launch())
+        try:
+            return await asyncio.shield(self._launching)
+        finally:
+            if self._launching is not None and self._launching.done():
+                self._launching = None
+
+    async def _launch(self):
+        started = time.perf_counter()
+        try:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        except Exception as e:
+            metrics.record_error('driver_start', e)
+            raise
+        finally:
+            metrics.observe('driver_start', time.perf_counter() - started)
+        self._count('launches')
+        logger.info('Launched Chromium for the Playwright engine')
+        return self._browser
+
+    def start(self):
+        """
+        Launch the browser now rather than on the first page
+        """
+        self._call(self._get_browser(), timeout=60)
+
+    async def _route(self, route, request, profile):
+        if profile.blocks_request(request.url, request.resource_type):
+            self._count('blocked_requests')
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _acquire_slot(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pages)
+        started = time.perf_counter()
+        saturated = self._slots.locked()
+        await self._slots.acquire()
+        metrics.pool_checkout('playwright', time.perf_counter() - started, saturated)
+        self._count('saturated', int(saturated))
+
+    async def _render(self, url, ready_selector, timeout, state):
+        metrics.restore(state)
+        profile = self.loading_for(url)
+        timeout_ms = timeout * 1000
+
+        await self._acquire_slot()
+        self._open_pages += 1
+        metrics.POOL_IN_USE.labels('playwright').inc()
+        context = None
+        try:
+            browser = await self._get_browser()
+            context = await browser.new_context(
+                user_agent=self.user_agent,
+                java_script_enabled=profile.javascript,
+                service_workers='block'
+            )
+            await context.route('**/*', lambda route, request: self._route(route, request, profile))
+            page = await context.new_page()
+
+            with metrics.stage('navigation'):
+                await page.goto(url, wait_until='domcontentloaded', timeout=timeout_ms)
+
+            # Wait for the content the caller needs rather than a fixed time
+            if ready_selector:
+                with metrics.stage('selector_wait'):
+                    await page.wait_for_selector(ready_selector, state='attached', timeout=timeout_ms)
+            else:
+                try:
+                    with metrics.stage('selector_wait'):
+                        await page.wait_for_load_state(
+                            'networkidle', timeout=min(timeout, self.network_idle_timeout) * 1000
+                        )
+                except PlaywrightTimeoutError:
+                    logger.warning(f"Timeout waiting for network idle on {url}, using partial page")
+
+            html = await page.content()
+            self._count('pages')
+            return html
+        except PlaywrightTimeoutError as e:
+            self._count('timeouts')
+            raise RenderTimeout(f"Timed out rendering {url}: {str(e)}")
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Error closing browser context: {str(e)}")
+            self._open_pages -= 1
+            metrics.POOL_IN_USE.labels('playwright').dec()
+            self._slots.release()
+
+    def render_page(self, url, ready_selector=None, timeout=15):
+        """
+        Return the rendered HTML of ``url``, with the same contract as the
+        Selenium ``render_page``: waits for ``ready_selector`` when given
+        (raising RenderTimeout if it never appears), otherwise for the
+        network to go idle.
+        """
+        timeout = max(timeout, 1)
+        # Leave room for a browser launch and for queueing behind busy pages
+        return self._call(self._render(url, ready_selector, timeout, metrics.capture()), timeout=timeout * 2 + 30)
+
+    async def _close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = self._playwright = None
+
+    def close(self):
+        """
+        Close the browser and stop the background loop
+        """
+        with self._lock:
+            loop = self._loop if self._pid == os.getpid() else None
+            self._loop = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Error closing Playwright: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['max_pages'] = self.max_pages
+        stats['open_pages'] = self._open_pages
+        stats['browser_connected'] = bool(self._browser is not None and self._browser.is_connected())
+        return stats
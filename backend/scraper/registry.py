@@ -0,0 +1,242 @@
+import os
+import re
+import math
+import json
+import time
+import logging
+import threading
+from urllib.parse import quote_plus, urlparse
+import soupsieve
+from extraction import PageExtractor
+from loading import LoadingProfile
+
+logger = logging.getLogger(__name__)
+
+FETCH_TIERS = ('http', 'browser')
+ADAPTER_KINDS = ('search_engine', 'listing')
+RATE_LIMIT_KEYS = ('rate', 'burst', 'failure_threshold', 'cooldown')
+
+
+class AdapterError(Exception):
+    """
+    Raised when a site adapter file is missing fields or fails to compile
+    """
+
+
+class SiteAdapter:
+    """
+    A site definition with its selectors and patterns compiled at load time
+    """
+
+    def __init__(self, spec, path=None, default_loading=None, exact_allow=True):
+        self.spec = spec
+        self.path = path
+        try:
+            self.name = spec['name']
+            self.kind = spec['kind']
+            self.search_url = spec['search_url']
+            self.fetch = spec.get('fetch', 'http')
+            self.concurrency = int(spec.get('concurrency', 1))
+            self.timeout = float(spec.get('timeout', 30))
+            self.deadline = float(spec.get('deadline', self.timeout))
+            self.max_results = int(spec.get('max_results', 3))
+            self.order = int(spec.get('order', 100))
+            self.rate_limit = dict(spec.get('rate_limit', {}))
+            self.selector_strings = dict(spec['selectors'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise AdapterError(f"Invalid adapter {path or spec!r}: {str(e)}")
+
+        if self.kind not in ADAPTER_KINDS:
+            raise AdapterError(f"Adapter {self.name}: unknown kind {self.kind!r}")
+        if self.fetch not in FETCH_TIERS:
+            raise AdapterError(f"Adapter {self.name}: unknown fetch tier {self.fetch!r}")
+        if 'item' not in self.selector_strings:
+            raise AdapterError(f"Adapter {self.name}: an 'item' selector is required")
+        self._check_rate_limit()
+
+        try:
+            self.selectors = {
+                key: soupsieve.compile(selector)
+                for key, selector in self.selector_strings.items()
+            }
+            self.patterns = {
+                key: re.compile(pattern)
+                for key, pattern in spec.get('patterns', {}).items()
+            }
+            page_fields = spec.get('page_fields')
+            self.page_extractor = PageExtractor([tuple(f) for f in page_fields]) if page_fields else None
+            # What the browser may load when this site is rendered
+            self.loading = LoadingProfile.from_spec(spec.get('loading'), default_loading or LoadingProfile())
+        except (re.error, soupsieve.SelectorSyntaxError, ValueError, TypeError, AttributeError) as e:
+            raise AdapterError(f"Adapter {self.name}: {str(e)}")
+
+        # Without request interception an allow entry would lift a whole block
+        # pattern (all scripts, a whole ad domain) rather than let one URL through
+        if not exact_allow and self.loading.unblocked_urls:
+            raise AdapterError(
+                f"Adapter {self.name}: loading.allow would unblock {', '.join(self.loading.unblocked_urls)} "
+                f"for every URL; allow entries that overlap a block pattern need SCRAPER_ENGINE=playwright"
+            )
+
+        # Caps how many scrapes of this site run at once in this worker
+        self.semaphore = threading.BoundedSemaphore(self.concurrency)
+
+    def _check_rate_limit(self):
+        # Checked here rather than when the host guard is built on the next search,
+        # so a bad value fails the load and the previous adapter stays in place
+        for key, value in self.rate_limit.items():
+            if key not in RATE_LIMIT_KEYS:
+                raise AdapterError(f"Adapter {self.name}: unknown rate_limit setting {key!r}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise AdapterError(f"Adapter {self.name}: rate_limit {key} must be a number")
+        if self.rate_limit.get('rate', 1) <= 0:
+            raise AdapterError(f"Adapter {self.name}: rate_limit rate must be above 0")
+        if self.rate_limit.get('burst', 1) < 1:
+            raise AdapterError(f"Adapter {self.name}: rate_limit burst must be at least 1")
+        if self.rate_limit.get('failure_threshold', 1) < 1:
+            raise AdapterError(f"Adapter {self.name}: rate_limit failure_threshold must be at least 1")
+        if self.rate_limit.get('cooldown', 0) < 0:
+            raise AdapterError(f"Adapter {self.name}: rate_limit cooldown must not be negative")
+
+    @property
+    def host(self):
+        host = urlparse(self.search_url).hostname or ''
+        return host[4:] if host.startswith('www.') else host
+
+    @property
+    def render_js(self):
+        return self.fetch == 'browser'
+
+    def serves(self, url):
+        host = urlparse(url).hostname or ''
+        return host == self.host or host.endswith('.' + self.host)
+
+    def url_for(self, query):
+        return self.search_url.format(query=quote_plus(query))
+
+    def select_one(self, key, element):
+        selector = self.selectors.get(key)
+        return selector.select_one(element) if selector is not None else None
+
+    def select(self, key, element, limit=0):
+        selector = self.selectors.get(key)
+        return selector.select(element, limit=limit) if selector is not None else []
+
+    def search(self, key, text):
+        pattern = self.patterns.get(key)
+        return pattern.search(text) if pattern is not None else None
+
+
+class AdapterRegistry:
+    """
+    Site adapters loaded from the JSON files in ``directory``.
+
+    The directory is re-checked at most every ``check_interval`` seconds when
+    adapters are looked up; if any file was added, removed or modified the
+    whole set is reloaded. A file that fails to load keeps its previous
+    version, so a bad edit never takes a working site offline. Adapters
+    without their own ``loading`` settings use ``default_loading``. Unless
+    ``exact_allow`` (the browser engine intercepts requests), an adapter
+    whose ``loading.allow`` overlaps a block pattern fails to load.
+    """
+
+    def __init__(self, directory, check_interval=2.0, default_loading=None, exact_allow=True):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.default_loading = default_loading
+        self.exact_allow = exact_allow
+
+        self._lock = threading.Lock()
+        self._adapters = {}
+        self._signature = None
+        self._checked_at = 0.0
+        self._loads = 0
+        self._errors = {}
+
+        self.reload()
+
+    def _current_signature(self):
+        signature = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                signature.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def reload(self):
+        """
+        Load every adapter file, keeping the previous adapter for files that fail
+        """
+        with self._lock:
+            signature = self._current_signature()
+            previous_by_path = {adapter.path: adapter for adapter in self._adapters.values()}
+            adapters = {}
+            errors = {}
+
+            for name, _, _ in signature:
+                path = os.path.join(self.directory, name)
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        adapter = SiteAdapter(
+                            json.load(f), path=path, default_loading=self.default_loading, exact_allow=self.exact_allow
+                        )
+                except (OSError, ValueError, AdapterError) as e:
+                    logger.error(f"Error loading site adapter {name}: {str(e)}")
+                    errors[name] = str(e)
+                    adapter = previous_by_path.get(path)
+                    if adapter is None:
+                        continue
+                adapters[adapter.name] = adapter
+
+            self._adapters = adapters
+            self._signature = signature
+            self._checked_at = time.monotonic()
+            self._errors = errors
+            self._loads += 1
+            logger.info(f"Loaded {len(adapters)} site adapters from {self.directory}")
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            changed = self._current_signature() != self._signature
+        except OSError as e:
+            logger.error(f"Error checking site adapters: {str(e)}")
+            return
+        if changed:
+            self.reload()
+
+    def get(self, name):
+        self._maybe_reload()
+        return self._adapters.get(name)
+
+    def by_kind(self, kind):
+        self._maybe_reload()
+        adapters = [adapter for adapter in self._adapters.values() if adapter.kind == kind]
+        return sorted(adapters, key=lambda adapter: (adapter.order, adapter.name))
+
+    def for_url(self, url):
+        """
+        The adapter whose site serves ``url``, or None for other sites
+        """
+        self._maybe_reload()
+        for adapter in self._adapters.values():
+            if adapter.serves(url):
+                return adapter
+        return None
+
+    def search_engine(self):
+        engines = self.by_kind('search_engine')
+        if not engines:
+            raise AdapterError('No search_engine adapter is configured')
+        return engines[0]
+
+    def stats(self):
+        return {
+            'adapters': sorted(self._adapters),
+            'loads': self._loads,
+            'errors': dict(self._errors),
+        }
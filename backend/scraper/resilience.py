@@ -0,0 +1,282 @@
+import time
+import logging
+import threading
+from urllib.parse import urlparse
+from tenacity import Retrying, stop_after_attempt, stop_after_delay, wait_random_exponential
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """
+    Raised when a host's token bucket has no token within the wait limit
+    """
+
+
+class CircuitOpen(Exception):
+    """
+    Raised when a host's circuit breaker is open and the call is skipped
+    """
+
+
+class TokenBucket:
+    """
+    Classic token bucket: ``rate`` tokens per second, up to ``burst`` stored
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait):
+        """
+        Take a token, sleeping up to ``max_wait`` seconds for one to accrue
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            if now + delay > deadline:
+                raise RateLimited(f"No token available within {max_wait}s")
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``cooldown`` seconds. Then a single trial call is let through
+    (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, cooldown=60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    raise CircuitOpen('Circuit breaker is open')
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpen('Circuit breaker is half-open, trial call in flight')
+                self._trial_in_flight = True
+
+    def cancel_call(self):
+        # The call never reached the host, so it says nothing about its health
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit breaker opened after {self.consecutive_failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+            }
+            if self.state == self.OPEN:
+                snapshot['reopens_in'] = round(max(self.cooldown - (time.monotonic() - self.opened_at), 0), 1)
+            return snapshot
+
+
+class HostGuard:
+    """
+    Rate limit, retry budget, breaker and counters for one host
+    """
+
+    def __init__(self, host, rate, burst, failure_threshold, cooldown, retry_ratio, max_retry_tokens):
+        self.host = host
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, cooldown)
+        self.retry_ratio = retry_ratio
+        self.max_retry_tokens = max_retry_tokens
+        self._retry_tokens = float(max_retry_tokens)
+        self._lock = threading.Lock()
+        self.counters = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'rate_limited': 0,
+            'short_circuited': 0,
+        }
+
+    def count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def earn_retry(self):
+        # Every success funds a fraction of a future retry
+        with self._lock:
+            self._retry_tokens = min(self.max_retry_tokens, self._retry_tokens + self.retry_ratio)
+
+    def spend_retry(self):
+        with self._lock:
+            if self._retry_tokens < 1:
+                return False
+            self._retry_tokens -= 1
+            self.counters['retries'] += 1
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = dict(self.counters)
+            snapshot['retry_tokens'] = round(self._retry_tokens, 2)
+        snapshot.update(self.breaker.snapshot())
+        return snapshot
+
+
+class HostGuards:
+    """
+    Per-domain token-bucket rate limiting, bounded jittered retries with a
+    retry budget, and circuit breakers for outbound scraping calls.
+
+    ``call(url, func)`` waits for a rate-limit token, skips immediately if
+    the host's breaker is open, and retries retryable failures with jittered
+    exponential backoff while the host's retry budget (a fraction of recent
+    successes) allows.
+    """
+
+    def __init__(self, rate=2.0, burst=5, max_wait=5.0, failure_threshold=5, cooldown=60,
+                 max_attempts=2, max_retry_delay=10.0, retry_ratio=0.2, max_retry_tokens=10):
+        self.defaults = {
+            'rate': rate,
+            'burst': burst,
+            'failure_threshold': failure_threshold,
+            'cooldown': cooldown,
+        }
+        self.max_wait = max_wait
+        self.max_attempts = max_attempts
+        self.max_retry_delay = max_retry_delay
+        self.retry_ratio = retry_ratio
+        self.max_retry_tokens = max_retry_tokens
+        self._guards = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_for(url):
+        host = urlparse(url).hostname or url
+        return host[4:] if host.startswith('www.') else host
+
+    def configure(self, host, **settings):
+        """
+        Override the rate limit or breaker settings for one host
+        """
+        with self._lock:
+            current = self._guards.get(host)
+            config = dict(self.defaults)
+            config.update({key: value for key, value in settings.items() if key in config})
+            if current is not None and (
+                current.bucket.rate, current.bucket.burst,
+                current.breaker.failure_threshold, current.breaker.cooldown
+            ) == (config['rate'], config['burst'], config['failure_threshold'], config['cooldown']):
+                return
+            self._guards[host] = self._new_guard(host, config)
+
+    def _new_guard(self, host, config):
+        return HostGuard(
+            host,
+            config['rate'],
+            config['burst'],
+            config['failure_threshold'],
+            config['cooldown'],
+            self.retry_ratio,
+            self.max_retry_tokens
+        )
+
+    def guard_for(self, url):
+        host = self.host_for(url)
+        with self._lock:
+            guard = self._guards.get(host)
+            if guard is None:
+                guard = self._guards[host] = self._new_guard(host, self.defaults)
+            return guard
+
+    def call(self, url, func, retryable=lambda error: True):
+        guard = self.guard_for(url)
+
+        def attempt():
+            guard.count('calls')
+            try:
+                guard.breaker.before_call()
+            except CircuitOpen:
+                guard.count('short_circuited')
+                raise
+            try:
+                guard.bucket.acquire(self.max_wait)
+            except RateLimited:
+                guard.count('rate_limited')
+                guard.breaker.cancel_call()
+                raise
+
+            try:
+                result = func()
+            except Exception:
+                guard.count('failures')
+                guard.breaker.record_failure()
+                raise
+            guard.count('successes')
+            guard.breaker.record_success()
+            guard.earn_retry()
+            return result
+
+        stop = stop_after_attempt(self.max_attempts) | stop_after_delay(self.max_retry_delay)
+
+        def should_retry(retry_state):
+            error = retry_state.outcome.exception()
+            if error is None or isinstance(error, (CircuitOpen, RateLimited)) or not retryable(error):
+                return False
+            # Tenacity asks before it checks stop; only charge the budget for a retry that will run
+            if stop(retry_state):
+                return False
+            return guard.spend_retry()
+
+        retrying = Retrying(
+            stop=stop,
+            wait=wait_random_exponential(multiplier=0.5, max=5),
+            retry=should_retry,
+            reraise=True
+        )
+        return retrying(attempt)
+
+    def snapshot(self):
+        with self._lock:
+            guards = list(self._guards.values())
+        return {guard.host: guard.snapshot() for guard in guards}
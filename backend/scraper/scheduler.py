@@ -0,0 +1,90 @@
+import time
+import logging
+from concurrent.futures import wait, FIRST_COMPLETED
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SearchTask:
+    """
+    One independently scheduled unit of scraping work (a source or a site)
+    """
+
+    def __init__(self, name, func, args=(), kwargs=None, timeout=30):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.timeout = timeout
+
+
+class TaskOutcome:
+    """
+    What a task produced: its results, or the error / timeout that stopped it
+    """
+
+    def __init__(self, task, results=None, error=None, timed_out=False, elapsed=0.0):
+        self.task = task
+        self.results = results or []
+        self.error = error
+        self.timed_out = timed_out
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None and not self.timed_out
+
+    def to_dict(self):
+        outcome = {
+            'task': self.task.name,
+            'results': self.results,
+            'elapsed': round(self.elapsed, 3)
+        }
+        if self.timed_out:
+            outcome['error'] = 'timeout'
+        elif self.error is not None:
+            outcome['error'] = str(self.error)
+        return outcome
+
+
+def run_tasks(executor, tasks):
+    """
+    Run ``tasks`` on ``executor`` and yield a TaskOutcome for each as soon as
+    it completes, fails or exceeds its own timeout.
+
+    Tasks that time out cannot be interrupted; they keep running in the
+    background but their results are discarded. Each task runs with its name
+    as the metrics site and records into the caller's trace.
+    """
+    started = time.monotonic()
+    pending = {}
+    for task in tasks:
+        future = executor.submit(metrics.bind(task.func, site=task.name), *task.args, **task.kwargs)
+        pending[future] = (task, started + task.timeout)
+
+    while pending:
+        now = time.monotonic()
+        next_deadline = min(deadline for _, deadline in pending.values())
+        done, _ = wait(list(pending), timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+
+        now = time.monotonic()
+        for future in done:
+            task, _ = pending.pop(future)
+            metrics.observe('task', now - started, site=task.name)
+            try:
+                results = future.result()
+            except Exception as e:
+                logger.error(f"Task {task.name} failed: {str(e)}")
+                metrics.record_error('task', e, site=task.name)
+                yield TaskOutcome(task, error=e, elapsed=now - started)
+            else:
+                yield TaskOutcome(task, results=results, elapsed=now - started)
+
+        for future, (task, deadline) in list(pending.items()):
+            if deadline <= now:
+                del pending[future]
+                future.cancel()
+                logger.warning(f"Task {task.name} timed out after {task.timeout}s")
+                metrics.TIMEOUTS.labels('task', task.name).inc()
+                yield TaskOutcome(task, timed_out=True, elapsed=now - started)
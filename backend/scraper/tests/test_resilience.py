@@ -0,0 +1,79 @@
+"""
+Retry budget accounting in HostGuards.call.
+
+Run from backend/scraper:
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resilience import HostGuards  # noqa: E402
+
+URL = 'http://example.com/search'
+
+
+class Flaky:
+    """
+    A fetch that always fails, counting how often it is called
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        raise IOError('connection reset')
+
+
+def guards(**settings):
+    # A limit and breaker loose enough that only the retry budget decides
+    settings.setdefault('rate', 1000)
+    settings.setdefault('burst', 1000)
+    settings.setdefault('failure_threshold', 1000)
+    return HostGuards(**settings)
+
+
+class RetryBudgetTest(unittest.TestCase):
+
+    def exhaust(self, host_guards, fetch, times=1):
+        for _ in range(times):
+            with self.assertRaises(IOError):
+                host_guards.call(URL, fetch)
+
+    def test_exhausted_call_spends_one_token_per_retry(self):
+        host_guards = guards(max_attempts=2, max_retry_tokens=10)
+        fetch = Flaky()
+        self.exhaust(host_guards, fetch, times=3)
+
+        snapshot = host_guards.snapshot()['example.com']
+        self.assertEqual(fetch.calls, 6)
+        self.assertEqual(snapshot['retries'], 3)
+        self.assertEqual(snapshot['retry_tokens'], 7)
+
+    def test_single_attempt_spends_nothing(self):
+        host_guards = guards(max_attempts=1, max_retry_tokens=10)
+        fetch = Flaky()
+        self.exhaust(host_guards, fetch)
+
+        snapshot = host_guards.snapshot()['example.com']
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(snapshot['retries'], 0)
+        self.assertEqual(snapshot['retry_tokens'], 10)
+
+    def test_empty_budget_stops_retrying(self):
+        host_guards = guards(max_attempts=3, max_retry_tokens=1)
+        fetch = Flaky()
+        self.exhaust(host_guards, fetch)
+
+        snapshot = host_guards.snapshot()['example.com']
+        self.assertEqual(fetch.calls, 2)
+        self.assertEqual(snapshot['retries'], 1)
+        self.assertEqual(snapshot['retry_tokens'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
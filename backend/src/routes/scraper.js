@@ -8,7 +8,7 @@ const auth = require('../middleware/auth');
 // @access  Private
 router.post('/search', auth, async (req, res) => {
   try {
-    const { query, item_id, sources } = req.body;
+    const { query, item_id, sources, stream } = req.body;
     
     if (!query) {
       return res.status(400).json({ msg: 'Search query is required' });
@@ -17,6 +17,22 @@ router.post('/search', auth, async (req, res) => {
     // Send the query to scraper service
     const scraperServiceUrl = process.env.SCRAPER_SERVICE_URL || 'http://scraper_service:5002/search';
     
+    // Relay NDJSON results per source as they arrive when nothing needs to be stored
+    if (stream && !item_id) {
+      const scraperStream = await axios.post(scraperServiceUrl, {
+        query,
+        sources: sources || ['general', 'specialized'],
+        stream: true
+      }, { responseType: 'stream' });
+      
+      res.setHeader('Content-Type', 'application/x-ndjson');
+      scraperStream.data.on('error', (streamErr) => {
+        console.error('Scraper stream error:', streamErr.message);
+        res.end();
+      });
+      return scraperStream.data.pipe(res);
+    }
+    
     const scraperResponse = await axios.post(scraperServiceUrl, {
       query,
       sources: sources || ['general', 'specialized']
@@ -61,6 +77,52 @@ router.post('/search', auth, async (req, res) => {
   }
 });
 
+// Job endpoints live next to /search on the scraper service
+const scraperJobsUrl = () =>
+  (process.env.SCRAPER_SERVICE_URL || 'http://scraper_service:5002/search').replace(/\/search$/, '/jobs');
+
+// @route   POST api/scraper/jobs
+// @desc    Queue a search on the scraper service and return its job id at once
+// @access  Private
+router.post('/jobs', auth, async (req, res) => {
+  try {
+    const { query, sources, priority } = req.body;
+    
+    if (!query) {
+      return res.status(400).json({ msg: 'Search query is required' });
+    }
+    
+    const jobResponse = await axios.post(scraperJobsUrl(), {
+      query,
+      sources: sources || ['general', 'specialized'],
+      priority: priority || 0
+    });
+    
+    res.status(202).json(jobResponse.data);
+  } catch (err) {
+    const status = err.response ? err.response.status : 500;
+    console.error('Scraper job submit error:', err.message);
+    res.status(status).json({ msg: 'Scraper job could not be queued', error: err.message });
+  }
+});
+
+// @route   GET api/scraper/jobs/:id
+// @desc    Get a scraper job; ?wait=N holds the request until it finishes or N seconds pass
+// @access  Private
+router.get('/jobs/:id', auth, async (req, res) => {
+  try {
+    const jobResponse = await axios.get(`${scraperJobsUrl()}/${encodeURIComponent(req.params.id)}`, {
+      params: { wait: req.query.wait || 0 }
+    });
+    
+    res.json(jobResponse.data);
+  } catch (err) {
+    const status = err.response ? err.response.status : 500;
+    console.error('Scraper job status error:', err.message);
+    res.status(status).json({ msg: 'Scraper job lookup failed', error: err.message });
+  }
+});
+
 // @route   POST api/scraper/enrich
 // @desc    Enrich item with scraped data
 // @access  Private